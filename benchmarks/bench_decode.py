@@ -0,0 +1,79 @@
+"""
+Decode throughput of DBLP search responses, in hits per second, for every
+available decoder in dblp_crawler.JSON_DECODERS.
+
+Run from the repository root:
+
+    python benchmarks/bench_decode.py [--hits 1000] [--pages 50] [--response saved.json]
+
+Without --response, a synthetic h=1000 page with realistic author lists is used.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import dblp_crawler  # noqa: E402
+
+
+def synthetic_page(hits, seed=0):
+    """Build a search response body shaped like DBLP's format=json output."""
+    rng = random.Random(seed)
+    hit_list = []
+    for i in range(hits):
+        authors = [{"@pid": f"{rng.randrange(10 ** 5)}/{i}", "text": f"Author {rng.randrange(10 ** 6)}"}
+                   for _ in range(rng.randint(1, 8))]
+        hit_list.append({
+            "@score": "1", "@id": str(i),
+            "info": {
+                "authors": {"author": authors if len(authors) > 1 else authors[0]},
+                "title": f"A study of data condensation, part {i}.",
+                "venue": "ICLR", "pages": "1-12", "year": "2024", "type": "Conference and Workshop Papers",
+                "access": "open", "key": f"conf/iclr/Author{i}24", "ee": f"https://openreview.net/forum?id={i}",
+                "url": f"https://dblp.org/rec/conf/iclr/Author{i}24",
+            },
+            "url": f"URL#{i}",
+        })
+    body = {"result": {
+        "query": "data condensation streamid:conf/iclr:",
+        "status": {"@code": "200", "text": "OK"},
+        "time": {"@unit": "msecs", "text": "12.34"},
+        "completions": {"@total": "1", "@computed": "1", "@sent": "1", "c": {"@sc": "1", "@dc": "1", "@oc": "1", "@id": "1", "text": "condensation"}},
+        "hits": {"@total": str(hits), "@computed": str(hits), "@sent": str(hits), "@first": "0", "hit": hit_list},
+    }}
+    return json.dumps(body).encode("utf-8")
+
+
+def bench(decode, body, pages):
+    start = time.perf_counter()
+    for _ in range(pages):
+        _, _, entries = decode(body)
+    elapsed = time.perf_counter() - start
+    return len(entries) * pages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search response decoding")
+    parser.add_argument("--hits", type=int, default=1000, help="Hits per synthetic page")
+    parser.add_argument("--pages", type=int, default=50, help="Pages decoded per decoder")
+    parser.add_argument("--response", help="Decode a saved search response instead of a synthetic page")
+    args = parser.parse_args()
+
+    body = Path(args.response).read_bytes() if args.response else synthetic_page(args.hits)
+    reference = dblp_crawler.JSON_DECODERS["json"](body)
+    baseline = None
+    for name, decode in dblp_crawler.JSON_DECODERS.items():
+        if decode(body) != reference:
+            print(f"{name}: entries differ from the json decoder")
+            continue
+        decode(body)  # Warm up
+        rate = bench(decode, body, args.pages)
+        baseline = baseline or rate
+        print(f"{name:8} {rate:12,.0f} hits/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
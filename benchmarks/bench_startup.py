@@ -0,0 +1,61 @@
+"""
+Cold-start latency of dblp_crawler: `import dblp_crawler` and `dblp_crawler.py --help`,
+each in a fresh interpreter, minus the interpreter's own startup time.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 150]
+
+Exits with status 1 if the import exceeds the budget or loads one of the modules
+that are meant to be imported lazily.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Heavy modules that only the code paths needing them may import
+LAZY_MODULES = ("requests", "openpyxl", "asyncio", "pandas", "numpy", "pyarrow")
+
+
+def best_of(command, runs):
+    """Fastest wall-clock time of command over runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dblp_crawler startup time")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per measurement; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, default=150, help="Maximum cold-import latency")
+    args = parser.parse_args()
+
+    baseline = best_of([sys.executable, "-c", "pass"], args.runs)
+    import_ms = best_of([sys.executable, "-c", "import dblp_crawler"], args.runs) - baseline
+    help_ms = best_of([sys.executable, "dblp_crawler.py", "--help"], args.runs) - baseline
+    loaded = subprocess.run(
+        [sys.executable, "-c", f"import sys, dblp_crawler; print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout.split()
+
+    print(f"interpreter  {baseline:7.1f} ms")
+    print(f"import       {import_ms:7.1f} ms  (budget {args.budget_ms:g} ms)")
+    print(f"--help       {help_ms:7.1f} ms")
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import takes {import_ms:.1f} ms, over the {args.budget_ms:g} ms budget")
+    if loaded:
+        failures.append(f"import loads {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
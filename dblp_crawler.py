@@ -1,25 +1,111 @@
-import requests
-import pandas as pd
+# requests, openpyxl and asyncio are imported where they are first needed, so that
+# --help, offline runs and non-Excel output do not pay for loading them
 from datetime import datetime
+import gzip
+import hashlib
+import html.entities
+import json
+import sqlite3
+import threading
+import socket
+import sys
 import time
 import os
+import warnings
 import re
 from pathlib import Path
 import argparse
+import csv
+from array import array
+from collections import Counter
 import logging
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-# Configure logging
-logging.basicConfig(
-    filename='./log/dblp_crawler.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
-
-def create_session_with_retries(total_retries=5, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504)):
-    """Create a requests Session with retry strategy."""
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+import xml.etree.ElementTree as ET
+
+# Optional fast JSON decoders for search responses, see JSON_DECODERS
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+LOG_FILE = './log/dblp_crawler.log'
+# One record per HTTP request with its timings, written only by the JSON log format
+REQUEST_LOG = logging.getLogger("dblp_crawler.requests")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object. Records of REQUEST_LOG carry their
+    timing fields in a `request` dict, which is merged into the object.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "request", None) or {})
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(log_file=LOG_FILE, fmt="text", max_bytes=10 * 1024 * 1024, backup_count=5):
+    """
+    Send all logging through a queue to a background thread that writes log_file.
+
+    logging calls on the crawl threads only enqueue their record. Formatting and disk
+    I/O happen on the QueueListener's thread, so workers never wait on the file or
+    the handler lock. The file is rotated once it reaches max_bytes, keeping
+    backup_count old files. With fmt="json" records are written as JSON lines and
+    REQUEST_LOG's per-request timing records are included. Called by main(), not on
+    import.
+
+    :return: The started QueueListener; stop() it before exiting to flush the queue.
+    """
+    import queue
+    from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    if fmt == "json":
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for previous in list(root.handlers):
+        root.removeHandler(previous)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    REQUEST_LOG.setLevel(logging.INFO if fmt == "json" else logging.WARNING)
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+DEFAULT_HEADERS = {
+    "User-Agent": "DBLPCrawler/1.0 (contact@example.com)"  # Replace with your actual contact
+}
+
+
+def create_session_with_retries(total_retries=5, backoff_factor=1, status_forcelist=(500, 502, 503, 504), pool_size=10):
+    """
+    Create a requests Session with retry strategy and a connection pool of pool_size.
+
+    429 responses are deliberately not retried here so that they reach the RateLimiter.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     session = requests.Session()
     retry = Retry(
         total=total_retries,
@@ -29,183 +115,2917 @@ def create_session_with_retries(total_retries=5, backoff_factor=1, status_forcel
         status_forcelist=status_forcelist,
         allowed_methods=["GET"]
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount('https://', adapter)
     session.mount('http://', adapter)
     return session
 
-def sanitize_filename(filename):
+class RateLimiter:
+    """
+    Token-bucket rate limiter shared by every request the crawler makes.
+
+    Tokens refill at `rate` per second up to `burst`. A 429 halves the rate and pauses
+    all callers for the Retry-After period; after `increase_after` consecutive
+    successes the rate grows by `increase_step` again, up to `max_rate`.
+    """
+
+    def __init__(self, rate=1.0, burst=2, min_rate=0.05, max_rate=None, increase_after=10, increase_step=0.1):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase_after = increase_after
+        self.increase_step = increase_step
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self._successes = 0
+
+    def on_throttled(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0
+            self._successes = 0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+        logging.warning(f"Rate limited by server, lowering request rate to {self.rate:.2f} req/s.")
+
+
+DEFAULT_RATE_LIMITER = RateLimiter()
+
+
+def _parse_retry_after(value, default=5):
+    """Parse a Retry-After header given in seconds; HTTP dates fall back to default."""
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _log_request(url, params, response, attempt, wait, elapsed, cache=None):
+    """Emit a REQUEST_LOG record with the timing fields of one request."""
+    params = params or {}
+    REQUEST_LOG.info(f"GET {url} {response.status_code if response is not None else cache}", extra={"request": {
+        "url": url,
+        "q": params.get("q"),
+        "f": params.get("f"),
+        "h": params.get("h"),
+        "status": response.status_code if response is not None else None,
+        "bytes": len(response.content) if response is not None else None,
+        "attempt": attempt,
+        "wait_ms": round(wait * 1000, 3),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "cache": cache,
+    }})
+
+
+def rate_limited_get(session, url, limiter=None, max_retries=5, **kwargs):
+    """GET url through the shared rate limiter, waiting out 429 responses."""
+    limiter = limiter or DEFAULT_RATE_LIMITER
+    for attempt in range(max_retries + 1):
+        started = time.perf_counter()
+        limiter.acquire()
+        sent = time.perf_counter()
+        response = session.get(url, **kwargs)
+        if REQUEST_LOG.isEnabledFor(logging.INFO):
+            _log_request(url, kwargs.get("params"), response, attempt, sent - started, time.perf_counter() - sent)
+        if response.status_code != 429:
+            limiter.on_success()
+            return response
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+        logging.warning(f"Received 429 for {url}. Retrying after {retry_after} seconds.")
+        limiter.on_throttled(retry_after)
+    return response
+
+class ResponseCache:
+    """
+    On-disk SQLite cache of raw DBLP search and BibTeX responses.
+
+    Entries are keyed by a hash of the request parameters (q, h, f, format) or of
+    the URL, expire after `ttl` seconds, and the least recently used ones are
+    evicted once the stored bodies exceed `max_bytes`. The ETag and Last-Modified
+    validators are stored with each body so that expired entries can be revalidated
+    with a conditional request (see cached_get).
+    """
+
+    KEY_PARAMS = ("q", "h", "f", "format")
+
+    def __init__(self, cache_dir, ttl=7 * 24 * 3600, max_bytes=512 * 1024 * 1024):
+        self.path = Path(cache_dir) / "responses.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE responses ADD COLUMN {column} TEXT")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @classmethod
+    def key_for(cls, params=None, url=None):
+        """Content address of a search request, or of a plain GET of url."""
+        if url is not None:
+            canonical = json.dumps({"url": url})
+        else:
+            canonical = json.dumps({name: str(params.get(name, "")) for name in cls.KEY_PARAMS}, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def lookup(self, key):
+        """
+        Return the entry for key, expired or not, as a dict with body, fresh, etag
+        and last_modified; None if there is none.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, stored_at, etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return {"body": row[0], "fresh": now - row[1] <= self.ttl, "etag": row[2], "last_modified": row[3]}
+
+    def get(self, key):
+        """Return the cached body for key, or None if it is missing or expired."""
+        entry = self.lookup(key)
+        return entry["body"] if entry is not None and entry["fresh"] else None
+
+    def put(self, key, body, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, stored_at, accessed_at, etag, last_modified)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, len(body), now, now, etag, last_modified),
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict(now)
+            self._conn.commit()
+
+    def touch(self, key):
+        """Mark an entry fresh again after the server confirmed it with a 304."""
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def _evict(self, now):
+        """
+        Drop expired entries that cannot be revalidated, then least recently used ones
+        until below 90% of max_bytes.
+        """
+        self._conn.execute(
+            "DELETE FROM responses WHERE stored_at < ? AND etag IS NULL AND last_modified IS NULL",
+            (now - self.ttl,),
+        )
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        target = self.max_bytes * 0.9
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if self._size <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= size
+        logging.info(f"Evicted cache entries, {self._size} bytes remain in {self.path}.")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def read_journal(path):
+    """
+    Read a CrawlJournal file without modifying it.
+
+    Later records of a cell supersede earlier ones. Reading stops at the first
+    damaged or incomplete line.
+
+    :return: A tuple (cells, totals, bibtex_done, valid_end): cells maps each (keyword,
+        venue, year) to its list of entry dicts, totals the cells recorded with one to
+        their share of their query's `@total`, bibtex_done is the set of downloaded URLs
+        and valid_end the byte length of the intact part of the file.
+    """
+    cells = {}
+    totals = {}
+    bibtex_done = set()
+    valid_end = 0
+    with Path(path).open("rb") as journal:
+        for line in journal:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete line")
+                record = json.loads(line)
+            except ValueError:
+                logging.warning(f"Ignoring damaged line in {path}.")
+                break
+            valid_end += len(line)
+            if record["type"] == "cell":
+                cell = tuple(record["cell"])
+                cells[cell] = record["results"]
+                if "total" in record:
+                    totals[cell] = record["total"]
+                else:
+                    totals.pop(cell, None)
+            elif record["type"] == "bibtex":
+                bibtex_done.add(record["url"])
+    return cells, totals, bibtex_done, valid_end
+
+
+class CrawlJournal:
+    """
+    Append-only checkpoint of a crawl, one fsync'd JSON line per completed unit of work.
+
+    Finished (keyword, venue, year) cells are stored with their entries and
+    downloaded BibTeX records with their URL, so an interrupted run can be resumed
+    without refetching and its output rebuilt from the journal alone. A torn last
+    line left by a crash is ignored on load. Only cells loaded on resume are kept
+    in `cells` (and their query shares in `totals`); newly recorded ones go straight
+    to disk.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = Path(path)
+        self.cells = {}
+        self.totals = {}
+        self.bibtex_done = set()
+        self._lock = threading.Lock()
+        if resume and self.path.exists():
+            self._load()
+        self._file = self.path.open("a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        cells, self.totals, self.bibtex_done, valid_end = read_journal(self.path)
+        self.cells = {cell: [Publication.from_dict(entry) for entry in results] for cell, results in cells.items()}
+        # Cut off a torn write so that new records start on a fresh line
+        os.truncate(self.path, valid_end)
+        logging.info(f"Loaded {len(self.cells)} cells and {len(self.bibtex_done)} BibTeX records from {self.path}.")
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_cell(self, cell, results, total=None):
+        """Record a finished cell, with its share of its query's `@total` if known."""
+        record = {"type": "cell", "cell": list(cell), "results": [dict(entry) for entry in results]}
+        if total is not None:
+            record["total"] = total
+        self._append(record)
+
+    def record_bibtex(self, url):
+        self.bibtex_done.add(url)
+        self._append({"type": "bibtex", "url": url})
+
+    def results_for(self, keywords, venues, years):
+        """Rebuild the keyword -> entries mapping of the given grid from completed cells."""
+        all_results = {keyword: [] for keyword in keywords}
+        for cell in iter_query_cells(keywords, venues, years):
+            all_results[cell[0]].extend(self.cells.get(cell, []))
+        return all_results
+
+    def compact(self):
+        """
+        Rewrite the journal with one record per cell and per BibTeX URL.
+
+        Superseded cell records, such as the older copies of cells refetched by
+        incremental runs, are dropped. The new file replaces the old one atomically.
+        """
+        with self._lock:
+            self._file.close()
+            cells, totals, bibtex_done, _ = read_journal(self.path)
+            compacted = self.path.with_name(self.path.name + ".tmp")
+            with compacted.open("w", encoding="utf-8") as journal:
+                for cell, results in cells.items():
+                    record = {"type": "cell", "cell": list(cell), "results": results}
+                    if cell in totals:
+                        record["total"] = totals[cell]
+                    journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+                for url in sorted(bibtex_done):
+                    journal.write(json.dumps({"type": "bibtex", "url": url}) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(compacted, self.path)
+            self._file = self.path.open("a", encoding="utf-8")
+        logging.info(f"Compacted {self.path} to {len(cells)} cells and {len(bibtex_done)} BibTeX records.")
+
+    def close(self):
+        self._file.close()
+
+class Publication(Mapping):
+    """
+    Compact, read-only record of one search hit, held in place of an entry dict.
+
+    It behaves as a mapping of the RESULT_FIELDS, so code written against entry
+    dicts keeps working and dict(publication) gives the plain entry for output.
+    __slots__ remove the per-instance dict. Venue, year and author names are
+    interned, so hits of the same venue/year or author share one string each.
+    Authors are kept as a tuple of names and joined only when read. The URL is
+    not stored when it is the canonical https://dblp.org/rec/<key>.
+
+    A conference hit with 4 authors and an 80-character title, in a crawl where
+    authors recur, takes about 390 bytes including its strings. As an entry dict it
+    takes about 830 bytes. The target is to stay under 0.5 KB per record.
+    """
+
+    __slots__ = ("title", "author_names", "venue", "year", "key", "_url")
+
+    def __init__(self, title="", authors=(), venue="", year="", url="", key=""):
+        """
+        :param authors: A sequence of author names, or the ", "-joined string of an entry dict.
+        """
+        if isinstance(authors, str):
+            authors = authors.split(", ") if authors else ()
+        self.title = title
+        self.author_names = tuple(sys.intern(name) for name in authors)
+        # DBLP has a few records listed under several venues, whose venue is a list
+        self.venue = sys.intern(venue) if isinstance(venue, str) else venue
+        self.year = sys.intern(year) if isinstance(year, str) else year
+        self.key = key
+        self._url = None if url == DBLP_RECORD_URL.format(key=key) else url
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(*(entry.get(field, "") for field in RESULT_FIELDS))
+
+    @property
+    def authors(self):
+        return ", ".join(self.author_names)
+
+    @property
+    def url(self):
+        return self._url if self._url is not None else DBLP_RECORD_URL.format(key=self.key)
+
+    def __getitem__(self, field):
+        if field not in RESULT_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        return iter(RESULT_FIELDS)
+
+    def __len__(self):
+        return len(RESULT_FIELDS)
+
+    def __repr__(self):
+        return f"Publication({dict(self)!r})"
+
+
+class DedupIndex:
+    """
+    Cross-query deduplication of publications keyed on the DBLP record key.
+
+    The same paper is often returned by several keywords and by overlapping
+    venue/year cells. add() records every cell a publication matched and reports
+    which entries are new, so that each paper is written once per keyword and its
+    BibTeX downloaded once overall. Entries without a key fall back to their URL.
+    """
+
+    def __init__(self):
+        self.matches = {}  # record key -> list of (keyword, venue, year) cells
+
+    @staticmethod
+    def key_of(entry):
+        return entry.get("key") or entry.get("url", "")
+
+    def add(self, cell, entries):
+        """
+        Register the entries of a completed cell.
+
+        :return: A tuple (rows, unique): entries not seen before for the cell's keyword,
+            and entries not seen before in any cell.
+        """
+        rows, unique = [], []
+        for entry in entries:
+            key = self.key_of(entry)
+            cells = self.matches.get(key)
+            if cells is None:
+                cells = self.matches[key] = []
+                unique.append(entry)
+            if not any(matched[0] == cell[0] for matched in cells):
+                rows.append(entry)
+            if cell not in cells:
+                cells.append(cell)
+        return rows, unique
+
+    def cells_for(self, entry):
+        """The (keyword, venue, year) cells that matched a publication so far."""
+        return self.matches.get(self.key_of(entry), [])
+
+    def __len__(self):
+        return len(self.matches)
+
+def cached_get(session, url, headers, limiter=None, cache=None, cache_key=None, decode=bytes, **kwargs):
+    """
+    GET url through the ResponseCache and return the decoded body.
+
+    Fresh entries are served without a request. Expired entries that carry an ETag or
+    Last-Modified validator are revalidated with If-None-Match/If-Modified-Since, and
+    a 304 refreshes them and serves the cached body, so only changed bodies are
+    transferred. Other successful responses are decoded and then stored. Error
+    statuses raise requests' HTTPError.
+    """
+    cached = cache.lookup(cache_key) if cache is not None else None
+    if cached is not None and cached["fresh"]:
+        if REQUEST_LOG.isEnabledFor(logging.INFO):
+            _log_request(url, kwargs.get("params"), None, 0, 0, 0, cache="hit")
+        return decode(cached["body"])
+
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if cached["etag"]:
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+    response = rate_limited_get(session, url, limiter, headers=request_headers, **kwargs)
+    if response.status_code == 304 and cached is not None:
+        cache.touch(cache_key)
+        return decode(cached["body"])
+
+    response.raise_for_status()
+    data = decode(response.content)
+    if cache is not None:
+        cache.put(cache_key, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return data
+
+def sanitize_filename(filename, max_bytes=200):
     # Remove or replace characters that are invalid in filenames
-    return re.sub(r'[\\/*?:"<>|]', "_", filename)
+    safe = re.sub(r'[\\/*?:"<>|]', "_", filename)
+    # Most filesystems cap a name at 255 bytes; leave room for the extension
+    return safe.encode("utf-8")[:max_bytes].decode("utf-8", "ignore")
+
+def bibtex_url(url):
+    """Map a DBLP record URL (https://dblp.org/rec/...) to its BibTeX export."""
+    return url if url.endswith(".bib") else f"{url}.bib"
+
+def fetch_bibtex(url, title, session, headers, limiter=None, cache=None):
+    """Download the BibTeX of one record. Returns its text, or None on failure."""
+    import requests
 
-def download_bibtex(url, title, bib_folder, session, headers):
+    url = bibtex_url(url)
+    cache_key = cache.key_for(url=url) if cache is not None else None
     try:
-        response = session.get(url, headers, timeout=10)
-        response.raise_for_status()
-        safe_title = sanitize_filename(title)
-        filename = bib_folder / f"{safe_title}.bib"
-        with filename.open("w", encoding="utf-8") as file:
-            file.write(response.text)
-        logging.info(f"Downloaded and saved as {filename}.")
-    except requests.exceptions.RequestException as e:
+        return cached_get(
+            session, url, headers, limiter, cache, cache_key,
+            decode=lambda body: body.decode("utf-8"), timeout=10,
+        )
+    except (requests.exceptions.RequestException, ValueError) as e:
         logging.error(f"Error downloading BibTeX for {title}: {e}")
+        return None
 
-def get_dblp_results(keyword, venue, year, session, headers, sleep_time=5):
-    """Fetch results from DBLP API for a given keyword, venues, and years."""
-    base_url = "https://dblp.org/search/publ/api"  # Use HTTPS
-    results = []
-    
+def download_bibtex(url, title, bib_folder, session, headers, limiter=None, cache=None):
+    """Download the BibTeX of one record. Returns the written path, or None on failure."""
+    text = fetch_bibtex(url, title, session, headers, limiter, cache)
+    if text is None:
+        return None
+    return write_bibtex_file(text, title, bib_folder)
+
+
+BIBTEX_ENTRY_START = re.compile(r"^@\w+\s*\{\s*([^,\s]+)\s*,", re.MULTILINE)
+
+
+def split_bibtex(text):
+    """
+    Split a multi-record BibTeX export into its entries.
+
+    :return: A list of (citation key, entry text) tuples, e.g. ("DBLP:conf/iclr/Foo24", "@inproceedings{...}").
+    """
+    starts = list(BIBTEX_ENTRY_START.finditer(text))
+    entries = []
+    for match, following in zip(starts, starts[1:] + [None]):
+        end = following.start() if following is not None else len(text)
+        entries.append((match.group(1), text[match.start():end].strip() + "\n"))
+    return entries
+
+
+def record_key_of_citation(citation_key):
+    """DBLP citation keys are the record key with a DBLP: prefix."""
+    return citation_key[len("DBLP:"):] if citation_key.startswith("DBLP:") else citation_key
+
+
+def write_bibtex_file(text, title, bib_folder):
+    """Save one BibTeX entry as <bib_folder>/<title>.bib and return the path."""
+    safe_title = sanitize_filename(title)
+    filename = bib_folder / f"{safe_title}.bib"
+    with filename.open("w", encoding="utf-8") as file:
+        file.write(text)
+    logging.info(f"Downloaded and saved as {filename}.")
+    return filename
+
+
+class BibliographyWriter:
+    """
+    One consolidated .bib file that entries are appended to as they arrive.
+
+    Each citation key is written once. A sidecar index <file>.idx holds one JSON line
+    per entry with its key, byte offset and length, so that downstream tools can seek
+    straight to an entry without parsing the whole file. With append=True an existing
+    file and index are extended instead of replaced; a missing index is rebuilt by
+    scanning the file.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.offsets = {}
+        rebuild = False
+        if append and self.path.exists():
+            if self.index_path.exists():
+                self.offsets = load_bibliography_index(self.index_path)
+            else:
+                # Never truncate a bibliography because its sidecar index went missing
+                logging.warning(f"{self.index_path} is missing, rebuilding it from {self.path}.")
+                self.offsets = scan_bibliography(self.path)
+                rebuild = True
+        else:
+            append = False
+        self._bib = self.path.open("ab" if append else "wb")
+        self._index = self.index_path.open("a" if append and not rebuild else "w", encoding="utf-8")
+        if rebuild:
+            for citation_key, (offset, length) in self.offsets.items():
+                self._index.write(json.dumps({"key": citation_key, "offset": offset, "length": length}) + "\n")
+            self._index.flush()
+        self._lock = threading.Lock()
+
+    def add(self, citation_key, bibtex):
+        """Append one entry unless its citation key is already present. Returns True if written."""
+        data = bibtex.rstrip("\n").encode("utf-8") + b"\n\n"
+        with self._lock:
+            if citation_key in self.offsets:
+                return False
+            offset = self._bib.tell()
+            self._bib.write(data)
+            self._bib.flush()
+            self.offsets[citation_key] = (offset, len(data))
+            self._index.write(json.dumps({"key": citation_key, "offset": offset, "length": len(data)}) + "\n")
+            self._index.flush()
+        return True
+
+    def read(self, citation_key):
+        """Return the text of a stored entry, or None."""
+        with self._lock:
+            if citation_key not in self.offsets:
+                return None
+            return read_bibliography_entry(self.path, *self.offsets[citation_key])
+
+    def close(self):
+        self._bib.close()
+        self._index.close()
+
+
+def load_bibliography_index(index_path):
+    """Read a BibliographyWriter sidecar index into {citation key: (offset, length)}."""
+    offsets = {}
+    with Path(index_path).open(encoding="utf-8") as index:
+        for line in index:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            offsets[record["key"]] = (record["offset"], record["length"])
+    return offsets
+
+
+def scan_bibliography(bib_path):
+    """Rebuild {citation key: (offset, length)} of a consolidated .bib file from its entry headers."""
+    data = Path(bib_path).read_bytes()
+    starts = list(re.finditer(BIBTEX_ENTRY_START.pattern.encode("utf-8"), data, re.MULTILINE))
+    offsets = {}
+    for match, following in zip(starts, starts[1:] + [None]):
+        end = following.start() if following is not None else len(data)
+        offsets.setdefault(match.group(1).decode("utf-8"), (match.start(), end - match.start()))
+    return offsets
+
+
+def read_bibliography_entry(bib_path, offset, length):
+    """Read one entry of a consolidated .bib file by its indexed offset and length."""
+    with Path(bib_path).open("rb") as bib:
+        bib.seek(offset)
+        return bib.read(length).decode("utf-8")
+
+
+class Bibliography:
+    """
+    Consolidated BibTeX output: one bibliography.bib overall, or one <keyword>.bib per keyword.
+
+    want(record_key, keyword) declares that a keyword's file should contain a record;
+    add(bibtex) stores a downloaded record (and any crossref'd entries that came with
+    it) in every file that wants it. A record downloaded for one keyword is copied
+    into the files of keywords that match it later, so each record is fetched once.
+    """
+
+    SINGLE_NAME = "bibliography"
+
+    def __init__(self, folder, per_keyword=False, append=False):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.per_keyword = per_keyword
+        self.append = append
+        self._writers = {}
+        self._wanted = {}  # record key -> keywords whose file still lacks it
+        self._lock = threading.Lock()
+
+    def _writer(self, keyword):
+        name = sanitize_filename(keyword) if self.per_keyword else self.SINGLE_NAME
+        writer = self._writers.get(name)
+        if writer is None:
+            writer = self._writers[name] = BibliographyWriter(self.folder / f"{name}.bib", append=self.append)
+        return writer
+
+    def want(self, record_key, keyword):
+        if not self.per_keyword:
+            return
+        citation_key = f"DBLP:{record_key}"
+        with self._lock:
+            writer = self._writer(keyword)
+            if citation_key in writer.offsets:
+                return
+            for other in list(self._writers.values()):
+                text = other.read(citation_key)
+                if text is not None:
+                    writer.add(citation_key, text)
+                    return
+            self._wanted.setdefault(record_key, set()).add(keyword)
+
+    def add(self, bibtex, title=None):
+        """Store a record's BibTeX; the first entry is the record itself. Returns its file path."""
+        entries = split_bibtex(bibtex)
+        if not entries:
+            logging.warning(f"No BibTeX entry found for {title}.")
+            return None
+        record_key = record_key_of_citation(entries[0][0])
+        with self._lock:
+            keywords = self._wanted.pop(record_key, None) if self.per_keyword else [None]
+            writers = [self._writer(keyword) for keyword in keywords or ()]
+            for writer in writers:
+                for citation_key, text in entries:
+                    writer.add(citation_key, text)
+        if not writers:
+            return None
+        logging.info(f"Saved BibTeX for {title} to {', '.join(str(writer.path) for writer in writers)}.")
+        return writers[0].path
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+
+
+class BibtexDownloader:
+    """
+    Bounded worker pool that downloads BibTeX files while the search is still running.
+
+    Items are queued with submit(url, title) and written as soon as each response
+    arrives. Workers share the search session (and so its connection pool) and the
+    RateLimiter. close() waits for the queue to drain and returns one report dict per
+    item with its title, url, path and ok flag; items that raised also carry their
+    error. With a CrawlJournal, URLs it already records are skipped and every
+    successful download is added to it.
+
+    Each response is written as <bib_folder>/<title>.bib unless `save`, a callable
+    save(bibtex, title) returning where the entry went, stores it elsewhere.
+    """
+
+    def __init__(self, bib_folder, session, headers, limiter=None, max_workers=4, journal=None, save=None, cache=None):
+        self.bib_folder = Path(bib_folder)
+        self.bib_folder.mkdir(parents=True, exist_ok=True)
+        self.session = session
+        self.headers = headers
+        self.limiter = limiter
+        self.journal = journal
+        self.cache = cache
+        self.save = save or (lambda bibtex, title: write_bibtex_file(bibtex, title, self.bib_folder))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bibtex")
+        self._futures = []
+
+    def _download(self, url, title):
+        try:
+            text = fetch_bibtex(url, title, self.session, self.headers, self.limiter, self.cache)
+            path = self.save(text, title) if text is not None else None
+            if path is not None and self.journal is not None:
+                self.journal.record_bibtex(url)
+        except Exception as e:
+            # One unsavable record must not abort close() and with it the rest of the run
+            logging.error(f"Error saving BibTeX for {title}: {e}")
+            return {"title": title, "url": url, "path": None, "ok": False, "error": str(e)}
+        return {"title": title, "url": url, "path": path, "ok": path is not None}
+
+    def submit(self, url, title):
+        if self.journal is not None and url in self.journal.bibtex_done:
+            return
+        self._futures.append(self._executor.submit(self._download, url, title))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        reports = [future.result() for future in self._futures]
+        failed = sum(1 for report in reports if not report["ok"])
+        logging.info(f"BibTeX downloads finished: {len(reports) - failed} saved, {failed} failed.")
+        return reports
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+DBLP_SEARCH_URL = "https://dblp.org/search/publ/api"  # Use HTTPS
+MAX_PAGE_SIZE = 1000  # Upper bound the DBLP search API accepts for `h`
+MAX_QUERY_LENGTH = 1000  # Keep coalesced `q` values well inside common URL-length limits
+MAX_COALESCED_HITS = 10000  # Split coalesced queries whose result set is larger than this
+
+
+def _venue_filter(venue):
+    return f"streamid:conf/{venue.lower()}:"
+
+
+def _year_filter(year):
+    return f"year:{year}:"
+
+
+def build_query_string(keyword, venues, years):
+    """
+    Build the DBLP search query for a keyword and one or more venues/years.
+
+    Several venues (or years) are combined with DBLP's `|` OR operator; 'all' drops
+    the corresponding filter.
+    """
+    if isinstance(venues, str):
+        venues = [venues]
+    if isinstance(years, str) or not isinstance(years, (list, tuple)):
+        years = [years]
+    query_parts = [keyword]
+    if not any(venue.lower() == 'all' for venue in venues):
+        query_parts.append('|'.join(_venue_filter(venue) for venue in venues))
+    if not any(str(year).lower() == 'all' for year in years):
+        query_parts.append('|'.join(_year_filter(year) for year in years))
+    return ' '.join(query_parts)
+
+
+def _fetch_search_page(params, session, headers, label, limiter=None, cache=None, max_retries=5, backoff=5, decode=json.loads):
+    """
+    Fetch one page of search results, retrying on request errors.
+
+    429 responses are handled by the rate limiter, which slows down all requests.
+    A ResponseCache, if given, is consulted (and revalidated) first through cached_get.
+
+    :param decode: Turns the raw response body into the returned value; bodies it
+        rejects with ValueError are refetched like failed requests.
+    :return: The decoded response, or None if the page could not be fetched.
+    """
+    import requests
+
+    cache_key = cache.key_for(params) if cache is not None else None
     retries = 0
-    max_retries = 5
-    backoff = 5  # Initial backoff time in seconds
-    
     while retries <= max_retries:
         try:
-            query_parts = [keyword]
-            if venue.lower() != 'all':
-                query_parts.append(f"streamid:conf/{venue.lower()}:")
-            if str(year).lower() != 'all':
-                query_parts.append(f"year:{year}:")
-            query_string = ' '.join(query_parts)
-            
-            
-            params = {
-                "q": query_string,
-                "format": "json",
-                "h": 100,  # Max number of results to fetch (max: 1000)
-            }
-            response = session.get(base_url, params=params, headers=headers, timeout=10)
-            
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", backoff))
-                logging.warning(f"Received 429 for '{keyword}' in {venue} {year}. Retrying after {retry_after} seconds.")
-                time.sleep(retry_after)
-                retries += 1
-                backoff *= 2  # Exponential backoff
-                continue  # Retry the request
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            total_hits = data.get("result", {}).get("hits", {}).get("@total", "0")
-            if total_hits == "0":
-                logging.info(f"No results for '{keyword}' in {venue} {year}.")
-                break  # No need to retry
-            
-            count = int(total_hits)
-            hits = data["result"]["hits"].get("hit", [])
-            
-            # Ensure hits is a list
-            if isinstance(hits, dict):
-                hits = [hits]
-            
-            for hit in hits:
-                info = hit.get("info", {})
-                authors_info = info.get("authors", {}).get("author", [])
-                if isinstance(authors_info, list):
-                    authors = ", ".join(author.get("text", "") for author in authors_info)
-                elif isinstance(authors_info, dict):
-                    authors = authors_info.get("text", "")
-                else:
-                    authors = ""
-            
-                entry = {
-                    "title": info.get("title", ""),
-                    "authors": authors,
-                    "venue": info.get("venue", ""),
-                    "year": info.get("year", ""),
-                    "url": info.get("url", ""),
-                }
-                results.append(entry)
-            
-            logging.info(f"'{keyword}' {venue} {year}: {count} results")
-            time.sleep(sleep_time)  # Adjust based on API rate limits
-            break  # Successful request, move to next
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching data for '{keyword}' {venue} {year}: {e}")
+            return cached_get(
+                session, DBLP_SEARCH_URL, headers, limiter, cache, cache_key,
+                decode=decode, params=params, timeout=10,
+            )
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.error(f"Error fetching data for {label}: {e}")
             retries += 1
             if retries > max_retries:
-                logging.error(f"Max retries exceeded for '{keyword}' {venue} {year}'. Skipping...")
+                logging.error(f"Max retries exceeded for {label}. Skipping...")
                 break
             logging.info(f"Retrying ({retries}/{max_retries}) after {backoff} seconds...")
             time.sleep(backoff)
             backoff *= 2  # Exponential backoff
-        except KeyError as e:
-            logging.error(f"Unexpected data format for '{keyword}' {venue} {year}: Missing key {e}")
-            break  # Skip to next iteration
-    
-    return results
+    return None
 
 
-def save_results_to_excel_file(filename, all_results):
+def _parse_hits(data):
     """
-    Saves all_results to an Excel file with each keyword's results in a separate sheet.
-    
-    :param filename: The name of the Excel file.
-    :param all_results: A dictionary where keys are sheet names and values are lists of entries.
+    Split a decoded search response into its hit count and hit `info` dicts.
+
+    :return: A tuple (total, sent, infos) where total is the `@total` hit count
+        and sent the number of hits contained in this page.
     """
-    try:
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            for sheet_name, results in all_results.items():
-                if not results:
-                    logging.info(f"No results to save for keyword: {sheet_name}")
-                    continue
-                df = pd.DataFrame(results)
-                # Excel sheet names have a maximum length of 31 characters
-                safe_sheet_name = sanitize_filename(sheet_name)[:31]
-                df.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-        logging.info(f"All results have been saved to {filename}.")
-    except Exception as e:
-        logging.error(f"Error saving results to Excel file: {e}")
+    hits_block = data["result"]["hits"]
+    total = int(hits_block.get("@total", "0"))
+    sent = int(hits_block.get("@sent", "0"))
+    hits = hits_block.get("hit", [])
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        description='Description of your script goes here',
-        formatter_class=argparse.ArgumentDefaultsHelpFormatter  # Shows defaults in help message
+    # Ensure hits is a list
+    if isinstance(hits, dict):
+        hits = [hits]
+    return total, sent, [hit.get("info", {}) for hit in hits]
+
+
+def _entry_from_info(info):
+    """Build the Publication stored for one search hit."""
+    authors_info = info.get("authors", {}).get("author", [])
+    if isinstance(authors_info, list):
+        authors = [author.get("text", "") for author in authors_info]
+    elif isinstance(authors_info, dict):
+        authors = [authors_info.get("text", "")]
+    else:
+        authors = ()
+
+    return Publication(
+        info.get("title", ""), authors, info.get("venue", ""), info.get("year", ""),
+        info.get("url", ""), info.get("key", ""),
     )
-    
-    parser.add_argument('--save_bibtex', action='store_true')
-    parser.add_argument('-k', '--keywords', nargs='+', default=['data condensation', 'data distillation'])
-    parser.add_argument('-v', '--venues', nargs='+', default=["ICLR", "ICML", "NIPS", "AAAI", "KDD", "ICDM", "WSDM", "WWW", "CIKM", "IJCAI", "CVPR", "ICCV", "ECCV"])
-    parser.add_argument('-y', '--years', nargs='+', default=['2024', '2023'])
-    parser.add_argument('-o', '--outdir', default='./data_condensation')
-    
-    return parser.parse_args()
 
-def main():
-    args = parse_args()
 
-    all_results = {}
-    outdir = Path(args.outdir)
-    outdir.mkdir(exist_ok=True)
-    excel_filename = Path(os.path.join(args.outdir, 'results.xlsx'))
-    # Create a session with retries
-    session = create_session_with_retries()
-    
-    # Define headers with a custom User-Agent
-    headers = {
-        "User-Agent": "DBLPCrawler/1.0 (contact@example.com)"  # Replace with your actual contact
-    }
-    if args.save_bibtex:
-        bib_dir = outdir / 'bibs'
-        bib_dir.mkdir(parents=True, exist_ok=True)
-   
-    for keyword in args.keywords:
-        keyword_results = []
-        for year in args.years:
-            for venue in args.venues:
-                logging.info(f"Fetching results for keyword: {keyword}, {year}, {venue}")
-                results = get_dblp_results(keyword, venue, year, session, headers)
-                keyword_results.extend(results)
-                if args.save_bibtex:
-                    for r in results:
-                        download_bibtex(r['url'], r['title'], bib_dir, session, headers)
-        all_results[keyword] = keyword_results
-
-    # Specify the Excel filename
-    save_results_to_excel_file(excel_filename, all_results)
+def _decode_search_page_json(body, loads=json.loads):
+    """Decode a search response through the generic dict tree. Returns (total, sent, entries)."""
+    total, sent, infos = _parse_hits(loads(body))
+    return total, sent, [_entry_from_info(info) for info in infos]
+
+
+def _decode_search_page_orjson(body):
+    return _decode_search_page_json(body, orjson.loads)
+
+
+def _msgspec_search_decoder():
+    """
+    Build a msgspec decoder typed after the search response.
+
+    Only the fields of an entry are materialized, as small structs rather than dicts;
+    everything else in the response is skipped while parsing.
+    """
+    from typing import Union
+
+    class Author(msgspec.Struct):
+        text: str = ""
+
+    class Authors(msgspec.Struct):
+        author: Union[list[Author], Author, None] = None
+
+    class Info(msgspec.Struct):
+        title: str = ""
+        authors: Union[Authors, None] = None
+        venue: Union[str, list[str]] = ""
+        year: str = ""
+        url: str = ""
+        key: str = ""
+
+    class Hit(msgspec.Struct):
+        info: Union[Info, None] = None
+
+    class Hits(msgspec.Struct):
+        total: Union[int, str] = msgspec.field(name="@total", default="0")
+        sent: Union[int, str] = msgspec.field(name="@sent", default="0")
+        hit: Union[list[Hit], Hit, None] = None
+
+    class Result(msgspec.Struct):
+        hits: Hits
+
+    class Response(msgspec.Struct):
+        result: Result
+
+    return msgspec.json.Decoder(Response)
+
+
+def _decode_search_page_msgspec(body):
+    try:
+        hits = _MSGSPEC_SEARCH_DECODER.decode(body).result.hits
+    except msgspec.ValidationError:
+        # Responses outside the typed schema take the generic path, which reports missing keys
+        return _decode_search_page_json(body)
+    except msgspec.DecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+
+    hit_list = hits.hit if isinstance(hits.hit, list) else [hits.hit] if hits.hit is not None else []
+    entries = []
+    for hit in hit_list:
+        info = hit.info
+        if info is None:
+            entries.append(_entry_from_info({}))
+            continue
+        authors_info = info.authors.author if info.authors is not None else None
+        if isinstance(authors_info, list):
+            authors = [author.text for author in authors_info]
+        else:
+            authors = [authors_info.text] if authors_info is not None else ()
+        entries.append(Publication(info.title, authors, info.venue, info.year, info.url, info.key))
+    return int(hits.total), int(hits.sent), entries
+
+
+JSON_DECODERS = {"json": _decode_search_page_json}
+if orjson is not None:
+    JSON_DECODERS["orjson"] = _decode_search_page_orjson
+if msgspec is not None:
+    _MSGSPEC_SEARCH_DECODER = _msgspec_search_decoder()
+    JSON_DECODERS["msgspec"] = _decode_search_page_msgspec
+# Fastest decoder available; all of them produce identical entries
+json_decoder = next(name for name in ("msgspec", "orjson", "json") if name in JSON_DECODERS)
+
+
+def set_json_decoder(name):
+    """Select the search response decoder by its JSON_DECODERS name."""
+    global json_decoder
+    if name not in JSON_DECODERS:
+        raise ValueError(f"JSON decoder {name!r} is not available (have {', '.join(JSON_DECODERS)})")
+    json_decoder = name
+
+
+def decode_search_page(body):
+    """
+    Decode a raw search response body into its hits with the selected decoder.
+
+    :return: A tuple (total, sent, entries) where total is the `@total` hit count,
+        sent the number of hits in this page and entries their Publications.
+    """
+    return JSON_DECODERS[json_decoder](body)
+
+
+class SearchError(Exception):
+    """
+    A search query could not be fetched completely.
+
+    `entries` holds the hits of the pages that did arrive. Cells of the query must
+    not be recorded as complete, so that a --resume run fetches them again.
+    """
+
+    def __init__(self, message, entries=()):
+        super().__init__(message)
+        self.entries = list(entries)
+
+
+def _search_all(query_string, label, session, headers, limiter=None, cache=None, page_size=MAX_PAGE_SIZE, max_hits=None):
+    """
+    Page through every hit of a search query with the `f`/`h` parameters.
+
+    Stops once `@total` hits have been collected or a page comes back short. If
+    max_hits is given and `@total` exceeds it, stops after the first page and
+    returns None instead of the hits so that the caller can split the query.
+
+    :return: A tuple (total, entries).
+    :raises SearchError: If a page could not be fetched or decoded after its retries.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    entries = []
+    total = 0
+    offset = 0
+
+    while True:
+        params = {
+            "q": query_string,
+            "format": "json",
+            "h": page_size,
+            "f": offset,
+        }
+        try:
+            data = _fetch_search_page(params, session, headers, label, limiter, cache, decode=decode_search_page)
+        except KeyError as e:
+            logging.error(f"Unexpected data format for {label}: Missing key {e}")
+            raise SearchError(f"{label}: unexpected response at offset {offset}", entries) from e
+        if data is None:
+            raise SearchError(f"{label}: could not fetch the page at offset {offset}", entries)
+        total, sent, page = data
+
+        if total == 0:
+            logging.info(f"No results for {label}.")
+            break
+        if max_hits is not None and total > max_hits:
+            return total, None
+
+        entries.extend(page)
+        offset += sent
+        if sent < page_size or offset >= total:
+            break
+        # Do not ask for more hits than are left, so the last page stays small
+        page_size = min(page_size, total - offset)
+
+    if entries:
+        logging.info(f"{label}: {len(entries)} results")
+    return total, entries
+
+
+def get_dblp_results(keyword, venue, year, session, headers, sleep_time=None, *, limiter=None, page_size=MAX_PAGE_SIZE, cache=None):
+    """
+    Fetch all results from DBLP API for a given keyword, venue, and year.
+
+    Results are paginated with the `f`/`h` parameters until `@total` hits have been
+    collected or a page comes back short. Requests are paced by `limiter`
+    (DEFAULT_RATE_LIMITER if omitted) and answered from `cache` when possible.
+
+    :param sleep_time: Deprecated and ignored; the limiter paces the requests.
+    """
+    if sleep_time is not None:
+        warnings.warn(
+            "get_dblp_results(sleep_time=...) is ignored; pass limiter=RateLimiter(...) instead",
+            DeprecationWarning, stacklevel=2,
+        )
+    query_string = build_query_string(keyword, venue, year)
+    label = f"'{keyword}' {venue} {year}"
+    try:
+        _, entries = _search_all(query_string, label, session, headers, limiter, cache, page_size)
+    except SearchError as e:
+        # Keep returning whatever arrived, as before
+        return e.entries
+    return entries
+
+
+def iter_query_cells(keywords, venues, years):
+    """Yield (keyword, venue, year) query cells in keyword, year, venue order."""
+    for keyword in keywords:
+        for year in years:
+            for venue in venues:
+                yield keyword, venue, year
+
+
+def _chunk_by_length(filters, items, budget):
+    """Split items into runs whose OR-joined filters fit in budget characters."""
+    chunks, current, length = [], [], 0
+    for item in items:
+        item_length = len(filters(item)) + 1
+        if current and length + item_length > budget:
+            chunks.append(tuple(current))
+            current, length = [], 0
+        current.append(item)
+        length += item_length
+    if current:
+        chunks.append(tuple(current))
+    return chunks
+
+
+def plan_queries(keywords, venues, years, coalesce=True, max_query_length=MAX_QUERY_LENGTH):
+    """
+    Group the keyword × venue × year cells into as few search queries as possible.
+
+    Each query is a (keyword, venues, years) tuple covering every combination of its
+    venues and years. 'all' cannot be OR-ed with concrete filters, so it always forms
+    a group of its own. With coalesce=False every cell becomes its own query.
+    """
+    if not coalesce:
+        return [(keyword, (venue,), (year,)) for keyword, venue, year in iter_query_cells(keywords, venues, years)]
+
+    def split_all(values):
+        groups = [(value,) for value in values if str(value).lower() == 'all']
+        concrete = [value for value in values if str(value).lower() != 'all']
+        return groups, concrete
+
+    venue_groups, concrete_venues = split_all(venues)
+    year_groups, concrete_years = split_all(years)
+    plans = []
+    for keyword in keywords:
+        # Give venues and years each a share of what the keyword leaves of the budget
+        budget = max(1, (max_query_length - len(keyword)) // 2)
+        keyword_venue_groups = venue_groups + _chunk_by_length(_venue_filter, concrete_venues, budget)
+        keyword_year_groups = year_groups + _chunk_by_length(_year_filter, concrete_years, budget)
+        for year_group in keyword_year_groups:
+            for venue_group in keyword_venue_groups:
+                plans.append((keyword, venue_group, year_group))
+    return plans
+
+
+def plan_cell_queries(cells, coalesce=True):
+    """
+    Group an arbitrary set of grid cells into queries that cover exactly those cells.
+
+    Per keyword, years owning the same venues are planned together with
+    plan_queries, so a full grid is planned as plan_queries would plan it.
+    """
+    by_keyword = {}
+    for keyword, venue, year in cells:
+        by_keyword.setdefault(keyword, {}).setdefault(year, []).append(venue)
+    plans = []
+    for keyword, year_venues in by_keyword.items():
+        years_by_venues = {}
+        for year, year_venue_list in year_venues.items():
+            years_by_venues.setdefault(tuple(year_venue_list), []).append(year)
+        for venue_group, years in years_by_venues.items():
+            plans.extend(plan_queries([keyword], list(venue_group), years, coalesce=coalesce))
+    return plans
+
+
+def partition_cells(cells, count):
+    """Cut cells, in the given order, into count contiguous runs whose sizes differ by at most one."""
+    cells = list(cells)
+    return [cells[part * len(cells) // count:(part + 1) * len(cells) // count] for part in range(count)]
+
+
+def _split_query(query):
+    """Halve a coalesced query along its venues, or its years once one venue is left."""
+    keyword, venues, years = query
+    if len(venues) > 1:
+        middle = len(venues) // 2
+        return [(keyword, venues[:middle], years), (keyword, venues[middle:], years)]
+    if len(years) > 1:
+        middle = len(years) // 2
+        return [(keyword, venues, years[:middle]), (keyword, venues, years[middle:])]
+    return None
+
+
+def _match_cell(entry, keyword, venues, years):
+    """Find the (keyword, venue, year) cell of a query that a hit belongs to."""
+    venue = venues[0]
+    if len(venues) > 1 or venue.lower() != 'all':
+        # Record keys look like conf/iclr/Foo24, matching streamid:conf/iclr:
+        key_parts = entry.get("key", "").split("/")
+        stream = key_parts[1] if len(key_parts) > 2 and key_parts[0] == "conf" else None
+        venue = next((v for v in venues if v.lower() == stream), None)
+    year = years[0]
+    if len(years) > 1 or str(year).lower() != 'all':
+        year = next((y for y in years if str(y) == entry.get("year", "")), None)
+    if venue is None or year is None:
+        return None
+    return keyword, venue, year
+
+
+def _query_label(query):
+    keyword, venues, years = query
+    return f"'{keyword}' {'|'.join(venues)} {'|'.join(str(year) for year in years)}"
+
+
+def page_size_for(total):
+    """Smallest even page size that still fetches `total` hits in the fewest requests."""
+    if total <= 0:
+        return MAX_PAGE_SIZE
+    pages = -(-total // MAX_PAGE_SIZE)
+    return -(-total // pages)
+
+
+def fetch_query(query, session, headers, limiter=None, cache=None, total=None, totals=None):
+    """
+    Run one (possibly coalesced) query and assign its hits back to their cells.
+
+    A coalesced query whose hit count is not known yet is probed with an h=0 count
+    request first; queries that match more than MAX_COALESCED_HITS hits are split
+    before any page is fetched. Pages are sized from the known hit count.
+
+    :param totals: Optional dictionary that receives each cell's share of the query's
+        `@total`, so that the shares of a query's cells add up to it. Hits that could
+        not be assigned to a cell are counted on the first cell of their year.
+    :return: A dictionary mapping each (keyword, venue, year) cell of the query to its entries.
+    :raises SearchError: If the query, or a part of a split query, failed.
+    """
+    keyword, venues, years = query
+    cells = {(keyword, venue, year): [] for year in years for venue in venues}
+    query_string = build_query_string(keyword, venues, years)
+    label = _query_label(query)
+    is_coalesced = len(cells) > 1
+    if is_coalesced and total is None:
+        total = count_dblp_results(query_string, session, headers, limiter, label)
+    if total == 0:
+        logging.info(f"No results for {label}.")
+        if totals is not None:
+            totals.update((cell, 0) for cell in cells)
+        return cells
+    entries = None
+    if not (is_coalesced and total is not None and total > MAX_COALESCED_HITS):
+        # A failed probe leaves total unknown; the first page then decides about splitting
+        total, entries = _search_all(
+            query_string, label, session, headers, limiter, cache,
+            page_size=page_size_for(total) if total else MAX_PAGE_SIZE,
+            max_hits=MAX_COALESCED_HITS if is_coalesced else None,
+        )
+
+    if entries is None:
+        logging.info(f"{label}: {total} hits exceed {MAX_COALESCED_HITS}, splitting query.")
+        for part in _split_query(query):
+            cells.update(fetch_query(part, session, headers, limiter, cache, totals=totals))
+        return cells
+
+    unassigned = []
+    for entry in entries:
+        cell = _match_cell(entry, keyword, venues, years)
+        if cell is None:
+            logging.warning(f"{label}: could not assign hit {entry['key']} to a venue/year.")
+            unassigned.append(entry)
+            continue
+        cells[cell].append(entry)
+    if totals is not None:
+        shares = {cell: len(results) for cell, results in cells.items()}
+        first = next(iter(cells))
+        for entry in unassigned:
+            year = next((y for y in years if str(y) == entry.get("year", "")), None)
+            shares[(keyword, venues[0], year) if year is not None else first] += 1
+        # Hits that DBLP counted but never sent
+        shares[first] += max(0, total - len(entries))
+        totals.update(shares)
+    return cells
+
+
+def _pending_queries(keywords, venues, years, coalesce=True, completed=None, partitions=1):
+    """
+    Plan queries covering exactly the cells of the grid that are missing from completed.
+
+    With partitions > 1 the pending cells are cut into that many equal parts first
+    and each part is coalesced on its own, trading requests for independent queries.
+    """
+    completed = completed or {}
+    pending = [cell for cell in iter_query_cells(keywords, venues, years) if cell not in completed]
+    return [query for part in partition_cells(pending, partitions) for query in plan_cell_queries(part, coalesce=coalesce)]
+
+
+def plan_crawl(keywords, venues, years, session, headers, limiter=None, coalesce=True, completed=None, concurrency=4, partitions=1):
+    """
+    Count-only planning pass: probe every pending query with h=0 to learn its `@total`.
+
+    Queries above MAX_COALESCED_HITS are split until each part fits, so the crawl
+    itself never has to. A query whose probe fails is kept with an unknown (None)
+    total and fetched normally.
+
+    :param partitions: Cut the pending cells into this many parts before coalescing,
+        as crawl_queue does.
+    :return: A list of (query, total) pairs to pass to crawl_async or crawl_queue as `plan`.
+    """
+    plan = []
+    queries = _pending_queries(keywords, venues, years, coalesce, completed, partitions)
+
+    def probe(query):
+        return query, count_dblp_results(build_query_string(*query), session, headers, limiter, _query_label(query))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while queries:
+            split = []
+            for query, total in executor.map(probe, queries):
+                parts = _split_query(query) if total is not None and total > MAX_COALESCED_HITS else None
+                if parts:
+                    split.extend(parts)
+                else:
+                    plan.append((query, total))
+            queries = split
+    return plan
+
+
+def estimate_plan(plan, rate, burst=1):
+    """
+    Estimate the cost of a plan from plan_crawl.
+
+    :return: A tuple (requests, seconds) for the pages still to fetch at `rate` requests per second.
+    """
+    requests_needed = sum(
+        -(-total // page_size_for(total)) if total is not None else 1
+        for _, total in plan if total != 0
+    )
+    return requests_needed, max(0, requests_needed - burst) / rate
+
+
+async def crawl_async(keywords, venues, years, session=None, headers=None, concurrency=4, limiter=None, cache=None, coalesce=True, completed=None, on_cell=None, collect=True, plan=None, totals=None):
+    """
+    Run the keyword × year × venue query cells concurrently.
+
+    Cells are coalesced into OR queries by plan_queries. At most `concurrency`
+    queries are in flight at once and all of their requests share one RateLimiter.
+
+    :param session: A requests Session to share; one is created (and closed) if omitted.
+    :param limiter: The RateLimiter to use; DEFAULT_RATE_LIMITER if omitted.
+    :param cache: Optional ResponseCache consulted before every search request.
+    :param coalesce: Combine venues and years into shared queries.
+    :param completed: Optional mapping of cells finished by an earlier run to their
+        entries; queries covering only those cells are skipped.
+    :param on_cell: Optional callback on_cell(cell, results), called on the event loop
+        as each (keyword, venue, year) cell completes. Cells of a query that failed
+        (see SearchError) are not reported, and are missing from the return value.
+    :param collect: Keep every cell's entries for the return value. Streaming callers
+        that consume on_cell pass False to keep memory bounded.
+    :param plan: Optional (query, total) pairs from plan_crawl to run instead of
+        plan_queries. Queries probed empty complete without any request, and the
+        others use page sizes derived from their totals.
+    :param totals: Optional dictionary that receives each fetched cell's share of its
+        query's `@total` (see fetch_query) before the cell is passed to on_cell.
+    :return: A dictionary mapping each keyword to its list of entries, or None if
+        collect is False.
+    """
+    import asyncio
+
+    completed = completed or {}
+    own_session = session is None
+    if own_session:
+        session = create_session_with_retries(pool_size=concurrency)
+    headers = headers or DEFAULT_HEADERS
+    semaphore = asyncio.Semaphore(concurrency)
+    if plan is None:
+        plan = [(query, None) for query in _pending_queries(keywords, venues, years, coalesce, completed)]
+    logging.info(f"Planned {len(plan)} queries for {len(keywords) * len(venues) * len(years)} cells.")
+    cell_results = dict(completed) if collect else None
+
+    async def run_query(query, total):
+        query_totals = {}
+        if total == 0:
+            results = {cell: [] for cell in iter_query_cells([query[0]], query[1], query[2])}
+            query_totals = dict.fromkeys(results, 0)
+        else:
+            async with semaphore:
+                logging.info(f"Fetching results for keyword: {query[0]}, {query[2]}, {query[1]}")
+                try:
+                    results = await asyncio.to_thread(fetch_query, query, session, headers, limiter, cache, total, query_totals)
+                except SearchError as e:
+                    logging.error(f"{e}; its cells are left for a --resume run.")
+                    return
+        if totals is not None:
+            totals.update(query_totals)
+        for cell in iter_query_cells([query[0]], query[1], query[2]):
+            if cell in completed:
+                continue
+            if collect:
+                cell_results[cell] = results[cell]
+            if on_cell is not None:
+                on_cell(cell, results[cell])
+
+    try:
+        await asyncio.gather(*(run_query(query, total) for query, total in plan))
+    finally:
+        if own_session:
+            session.close()
+
+    if not collect:
+        return None
+    all_results = {keyword: [] for keyword in keywords}
+    for cell in iter_query_cells(keywords, venues, years):
+        all_results[cell[0]].extend(cell_results.get(cell, []))
+    return all_results
+
+
+def crawl(keywords, venues, years, **kwargs):
+    """Blocking wrapper around crawl_async for library use."""
+    import asyncio
+
+    return asyncio.run(crawl_async(keywords, venues, years, **kwargs))
+
+
+def count_dblp_results(query_string, session, headers, limiter=None, label=None):
+    """Return `@total` of a search query with a count-only (h=0) request, or None on failure."""
+    params = {"q": query_string, "format": "json", "h": 0, "f": 0}
+    try:
+        data = _fetch_search_page(params, session, headers, label or query_string, limiter, decode=decode_search_page)
+    except KeyError as e:
+        logging.error(f"Unexpected data format for {label or query_string}: Missing key {e}")
+        return None
+    return data[0] if data is not None else None
+
+
+def parse_shard(spec):
+    """Parse a --shard value "i/N" into (i, N), where shards are numbered 0 to N - 1."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {spec!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}, got {index}")
+    return index, count
+
+
+def shard_cells(keywords, venues, years, shard):
+    """
+    Return the set of grid cells owned by one shard of a sharded run.
+
+    The cells are cut in grid order into equal contiguous runs, so shards get the
+    same number of cells however few keywords there are; each shard then coalesces
+    its own cells. Every shard must run with the same grid to agree on the partition.
+
+    :param shard: A tuple (index, count) as returned by parse_shard.
+    """
+    index, count = shard
+    return set(partition_cells(iter_query_cells(keywords, venues, years), count)[index])
+
+
+def merge_shards(shard_dirs, outdir, keywords, venues, years, fmt="xlsx"):
+    """
+    Combine the outputs of a sharded run into one result file and one bibs folder.
+
+    Results are rebuilt from every shard's checkpoint.jsonl in grid order and
+    deduplicated exactly as a single run would. Per-paper .bib files are copied into
+    <outdir>/bibs unless present, and consolidated bibliographies are merged entry by
+    entry through their offset index, keeping each citation key once.
+
+    :return: The number of grid cells that no shard has recorded.
+    """
+    outdir = Path(outdir)
+    recorded = {}
+    bib_folder = outdir / "bibs"
+    for shard_dir in shard_dirs:
+        shard_dir = Path(shard_dir)
+        journal_path = shard_dir / "checkpoint.jsonl"
+        if journal_path.exists():
+            cells = read_journal(journal_path)[0]
+            recorded.update((cell, [Publication.from_dict(entry) for entry in results]) for cell, results in cells.items())
+        else:
+            logging.warning(f"{shard_dir} has no checkpoint journal.")
+
+        for bib_path in sorted((shard_dir / "bibs").glob("*.bib")):
+            bib_folder.mkdir(parents=True, exist_ok=True)
+            target = bib_folder / bib_path.name
+            index_path = bib_path.with_name(bib_path.name + ".idx")
+            if index_path.exists():
+                writer = BibliographyWriter(target, append=True)
+                for citation_key, (offset, length) in load_bibliography_index(index_path).items():
+                    writer.add(citation_key, read_bibliography_entry(bib_path, offset, length))
+                writer.close()
+            elif not target.exists():
+                target.write_bytes(bib_path.read_bytes())
+
+    dedup = DedupIndex()
+    missing = 0
+    with open_result_writer(fmt, outdir) as writer:
+        for cell in iter_query_cells(keywords, venues, years):
+            if cell not in recorded:
+                logging.warning(f"No shard has recorded {cell}.")
+                missing += 1
+                continue
+            rows, _ = dedup.add(cell, recorded[cell])
+            writer.write_many(cell[0], rows)
+    logging.info(f"Merged {len(shard_dirs)} shards: {len(dedup)} unique publications, {missing} cells missing.")
+    return missing
+
+
+class Broker:
+    """
+    Task queue shared by a coordinator and any number of worker processes.
+
+    Tasks are (kind, payload) pairs, enqueued once each. A worker lease()s a task
+    for `lease` seconds and either ack()s it with a JSON-serializable result or
+    fail()s it. A task whose lease runs out, because its worker crashed or hung,
+    is handed to the next worker that asks, until it has been leased max_attempts
+    times and is failed for good. Subclasses implement the storage;
+    SqliteBroker needs nothing beyond a file that every process can open.
+    """
+
+    def __init__(self, lease=600, max_attempts=3):
+        self.lease_seconds = lease
+        self.max_attempts = max_attempts
+
+    def enqueue_many(self, kind, payloads, keep_done=True):
+        """
+        Add tasks unless already queued. Returns the task ids in payload order.
+
+        Tasks queued before that failed for good are queued again. Tasks done before
+        keep their result if keep_done is set, and are queued again otherwise.
+        """
+        raise NotImplementedError
+
+    def lease(self, worker):
+        """Take the oldest available task as a dict with id, kind and payload, or None."""
+        raise NotImplementedError
+
+    def ack(self, task_id, result=None):
+        raise NotImplementedError
+
+    def fail(self, task_id, worker, error):
+        """
+        Return a task leased by worker to the queue, or give up on it after
+        max_attempts leases. Ignored if the lease has passed to another worker.
+        """
+        raise NotImplementedError
+
+    def finished(self, task_ids):
+        """Return (task id, result) pairs of the given tasks that are done; result is None for failed ones."""
+        raise NotImplementedError
+
+    def counts(self):
+        """Number of tasks per state: pending, leased, done and failed."""
+        raise NotImplementedError
+
+    def drained(self):
+        """True once tasks have been queued and none is pending or leased."""
+        counts = self.counts()
+        return sum(counts.values()) > 0 and not counts.get("pending") and not counts.get("leased")
+
+    def close(self):
+        pass
+
+
+class SqliteBroker(Broker):
+    """
+    Broker on a SQLite database shared by processes on one host or a shared filesystem.
+
+    Every state change runs in a BEGIN IMMEDIATE transaction, so concurrent leases
+    never hand out the same task twice. The queue outlives the processes: a rerun
+    of the coordinator against the same file (with --resume) collects finished
+    tasks instead of queueing them again, and retries the ones that failed.
+    """
+
+    def __init__(self, path, lease=600, max_attempts=3):
+        super().__init__(lease, max_attempts)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT,"
+            " UNIQUE (kind, payload))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks(state, id)")
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = work()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return value
+
+    def enqueue_many(self, kind, payloads, keep_done=True):
+        encoded = [json.dumps(payload, sort_keys=True) for payload in payloads]
+        requeue = "('failed')" if keep_done else "('failed', 'done')"
+
+        def work():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (kind, payload) VALUES (?, ?)", ((kind, text) for text in encoded)
+            )
+            self._conn.executemany(
+                "UPDATE tasks SET state = 'pending', worker = NULL, lease_until = NULL, attempts = 0,"
+                f" result = NULL, error = NULL WHERE kind = ? AND payload = ? AND state IN {requeue}",
+                ((kind, text) for text in encoded),
+            )
+            return [
+                self._conn.execute("SELECT id FROM tasks WHERE kind = ? AND payload = ?", (kind, text)).fetchone()[0]
+                for text in encoded
+            ]
+        return self._transaction(work)
+
+    def lease(self, worker):
+        def work():
+            now = time.time()
+            # A task that keeps killing its workers would otherwise be re-leased forever
+            expired = self._conn.execute(
+                "UPDATE tasks SET state = 'failed', error = 'lease expired on every attempt'"
+                " WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            if expired.rowcount:
+                logging.error(f"Gave up on {expired.rowcount} tasks whose lease expired {self.max_attempts} times.")
+            row = self._conn.execute(
+                "SELECT id, kind, payload, state, worker FROM tasks"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, kind, payload, state, previous = row
+            if state == "leased":
+                logging.warning(f"Lease of task {task_id} by {previous} expired, re-leasing it to {worker}.")
+            self._conn.execute(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + self.lease_seconds, task_id),
+            )
+            return {"id": task_id, "kind": kind, "payload": json.loads(payload)}
+        return self._transaction(work)
+
+    def ack(self, task_id, result=None):
+        # A late ack from a worker whose lease was taken over is as good as the new one
+        self._transaction(lambda: self._conn.execute(
+            "UPDATE tasks SET state = 'done', result = ? WHERE id = ? AND state != 'done'",
+            (json.dumps(result, ensure_ascii=False), task_id),
+        ))
+
+    def fail(self, task_id, worker, error):
+        self._transaction(lambda: self._conn.execute(
+            "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ?"
+            " WHERE id = ? AND state = 'leased' AND worker = ?",
+            (self.max_attempts, str(error), task_id, worker),
+        ))
+
+    def finished(self, task_ids):
+        task_ids = list(task_ids)
+        found = []
+        with self._lock:
+            # Stay below SQLite's limit on bound parameters
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start:start + 500]
+                found.extend(self._conn.execute(
+                    f"SELECT id, state, result FROM tasks WHERE state IN ('done', 'failed')"
+                    f" AND id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        return [(task_id, json.loads(result) if state == "done" else None) for task_id, state, result in found]
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _run_task(task, session, headers, limiter=None, cache=None):
+    """
+    Execute one broker task and return its result.
+
+    :raises SearchError: If the query could not be fetched completely, so that the
+        task is failed back to the broker instead of acked with empty cells.
+    """
+    if task["kind"] != "query":
+        raise ValueError(f"Unknown task kind {task['kind']!r}")
+    keyword, venues, years = task["payload"]["query"]
+    totals = {}
+    cells = fetch_query((keyword, tuple(venues), tuple(years)), session, headers, limiter, cache, task["payload"]["total"], totals)
+    return {
+        "cells": [[list(cell), [dict(entry) for entry in results]] for cell, results in cells.items()],
+        "totals": [[list(cell), total] for cell, total in totals.items()],
+    }
+
+
+def run_worker(broker, session, headers, limiter=None, cache=None, concurrency=1, worker_id=None, poll=5.0):
+    """
+    Pull, execute and ack broker tasks until the queue is drained.
+
+    A worker started before the coordinator has queued anything waits for work.
+    Tasks that raise are failed back to the broker to be retried elsewhere.
+
+    :param concurrency: Number of tasks this process runs at once.
+    :return: The number of tasks this process completed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+    def work(thread):
+        name = f"{worker_id}-{thread}"
+        done = 0
+        while True:
+            task = broker.lease(name)
+            if task is None:
+                if broker.drained():
+                    return done
+                time.sleep(poll)
+                continue
+            try:
+                result = _run_task(task, session, headers, limiter, cache)
+            except Exception as e:
+                logging.error(f"{name}: task {task['id']} failed: {e}")
+                broker.fail(task["id"], name, e)
+                continue
+            broker.ack(task["id"], result)
+            done += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        done = sum(executor.map(work, range(concurrency)))
+    logging.info(f"Worker {worker_id} completed {done} tasks.")
+    return done
+
+
+def crawl_queue(broker, keywords, venues, years, coalesce=True, completed=None, on_cell=None, plan=None, poll=2.0, totals=None, partitions=16, keep_done=True):
+    """
+    Coordinator side of a distributed crawl: queue the grid's queries and collect the results.
+
+    The pending cells are cut into `partitions` equal parts, each part is coalesced
+    into its own queries, and every query becomes one broker task. Fast workers
+    simply take more of them and the load balances itself however uneven the cells
+    are. Results are passed to on_cell as the workers ack their tasks.
+
+    :param plan: Optional (query, total) pairs from plan_crawl, run with the same
+        partitions; queries probed empty complete without a task.
+    :param totals: Optional dictionary that receives each reported cell's share of its
+        query's `@total`, as in crawl_async.
+    :param keep_done: Collect the results of tasks a previous coordinator run left
+        done in the queue instead of fetching them again, as after a coordinator crash.
+    :return: The number of tasks that failed for good; their cells are not reported.
+    """
+    completed = completed or {}
+    totals = {} if totals is None else totals
+    if plan is None:
+        plan = [(query, None) for query in _pending_queries(keywords, venues, years, coalesce, completed, partitions)]
+
+    def report(cell, results):
+        if cell not in completed and on_cell is not None:
+            on_cell(cell, results)
+
+    payloads = []
+    for query, total in plan:
+        if total == 0:
+            for cell in iter_query_cells([query[0]], query[1], query[2]):
+                totals[cell] = 0
+                report(cell, [])
+        else:
+            payloads.append({"query": [query[0], list(query[1]), list(query[2])], "total": total})
+    remaining = set(broker.enqueue_many("query", payloads, keep_done=keep_done))
+    logging.info(f"Queued {len(remaining)} query tasks.")
+
+    failed = 0
+    while remaining:
+        finished = broker.finished(remaining)
+        for task_id, result in finished:
+            remaining.discard(task_id)
+            if result is None:
+                logging.error(f"Task {task_id} failed on every attempt, its cells are left for a --resume run.")
+                failed += 1
+                continue
+            totals.update((tuple(cell), total) for cell, total in result.get("totals", ()))
+            for cell, results in result["cells"]:
+                report(tuple(cell), [Publication.from_dict(entry) for entry in results])
+        if remaining and not finished:
+            logging.info(f"Waiting for {len(remaining)} tasks: {broker.counts()}")
+            time.sleep(poll)
+    return failed
+
+
+def unchanged_cells(previous, keywords, venues, years, session, headers, limiter=None, coalesce=True, open_years=1, totals=None):
+    """
+    Pick the cells of an earlier run that an incremental crawl can keep as they are.
+
+    Years from open_years - 1 before the current year onwards (and 'all') are always
+    refetched. For the remaining years, every planned query whose cells were all
+    recorded before is checked with an h=0 count probe and kept when its `@total`
+    still equals the `@total` recorded for it.
+
+    :param previous: Mapping of cells recorded by the earlier run to their entries.
+    :param totals: Mapping of recorded cells to their share of their query's `@total`,
+        as journaled by CrawlJournal. Cells without one count their entries, which
+        misses hits that could not be assigned to a cell.
+    :return: The subset of previous that does not need refetching.
+    """
+    totals = totals or {}
+    first_open = datetime.now().year - open_years + 1
+    closed_years = [year for year in years if str(year).isdigit() and int(year) < first_open]
+    kept = {}
+    for query in plan_queries(keywords, venues, closed_years, coalesce=coalesce):
+        cells = list(iter_query_cells([query[0]], query[1], query[2]))
+        if any(cell not in previous for cell in cells):
+            continue
+        label = f"'{query[0]}' {'|'.join(query[1])} {'|'.join(str(year) for year in query[2])}"
+        recorded = sum(totals.get(cell, len(previous[cell])) for cell in cells)
+        total = count_dblp_results(build_query_string(*query), session, headers, limiter, label)
+        if total == recorded:
+            kept.update((cell, previous[cell]) for cell in cells)
+        else:
+            logging.info(f"{label}: hit count changed from {recorded} to {total}, refetching.")
+    logging.info(f"Incremental crawl keeps {len(kept)} of {len(previous)} recorded cells.")
+    return kept
+
+
+DBLP_RECORD_URL = "https://dblp.org/rec/{key}"
+# Publication elements of dblp.xml; <www> records are person pages and are skipped
+DUMP_RECORD_TAGS = {"article", "inproceedings", "proceedings", "book", "incollection", "phdthesis", "mastersthesis"}
+DUMP_FIELD_TAGS = {"author", "editor", "title", "year", "booktitle", "journal"}
+
+
+class _DumpRecordTarget:
+    """
+    XMLParser target that turns dblp.xml publication elements into flat records.
+
+    No element tree is built: only the fields of the current record are kept and the
+    finished records are handed out by iter_dump_records, so memory stays flat.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._record = None
+        self._field = None
+        self._text = []
+
+    def start(self, tag, attrs):
+        if self._record is None:
+            if tag in DUMP_RECORD_TAGS:
+                self._record = {
+                    "type": tag, "key": attrs.get("key", ""), "mdate": attrs.get("mdate", ""),
+                    "authors": [], "editors": [],
+                }
+        elif self._field is None and tag in DUMP_FIELD_TAGS:
+            self._field = tag
+            self._text = []
+
+    def data(self, text):
+        if self._field is not None:
+            self._text.append(text)
+
+    def end(self, tag):
+        if self._record is None:
+            return
+        if tag == self._field:
+            value = "".join(self._text).strip()
+            if tag in ("author", "editor"):
+                self._record[f"{tag}s"].append(value)
+            else:
+                self._record.setdefault(tag, value)
+            self._field = None
+        elif tag == self._record["type"] and self._field is None:
+            self.records.append(self._record)
+            self._record = None
+
+    def close(self):
+        pass
+
+
+def iter_dump_records(dump_path, chunk_size=1 << 20):
+    """
+    Stream the publication records of a dblp.xml(.gz) dump.
+
+    Each record is a dict with type, key, mdate, title, authors, editors, year and
+    booktitle or journal. Entities declared in dblp.dtd are resolved from the HTML
+    entity table, so the DTD does not have to be present.
+    """
+    target = _DumpRecordTarget()
+    parser = ET.XMLParser(target=target)
+    parser.entity.update((name, chr(code)) for name, code in html.entities.name2codepoint.items())
+    opener = gzip.open if str(dump_path).endswith(".gz") else open
+    with opener(dump_path, "rb") as dump:
+        while True:
+            chunk = dump.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            yield from target.records
+            target.records.clear()
+    parser.close()
+    yield from target.records
+
+
+def _keyword_matcher(keyword):
+    """
+    Approximate DBLP's search semantics: every word of the keyword has to be the
+    prefix of some word of the title, ignoring case.
+    """
+    terms = keyword.lower().split()
+
+    def matches(title):
+        words = re.findall(r"\w+", title.lower())
+        return all(any(word.startswith(term) for word in words) for term in terms)
+    return matches
+
+
+def entry_from_record(record):
+    """Build the same Publication get_dblp_results produces from a dump record."""
+    return Publication(
+        record.get("title", ""), record["authors"] or record["editors"],
+        record.get("booktitle") or record.get("journal", ""), record.get("year", ""),
+        DBLP_RECORD_URL.format(key=record["key"]), record["key"],
+    )
+
+
+def _record_cells(record, keywords, venues, years):
+    """Yield the (keyword, venue, year) cells that a dump record falls into."""
+    title = record.get("title", "")
+    year = record.get("year", "")
+    key_parts = record["key"].split("/")
+    stream = key_parts[1] if len(key_parts) > 2 and key_parts[0] == "conf" else None
+    cell_years = [y for y in years if str(y).lower() == 'all' or str(y) == year]
+    cell_venues = [v for v in venues if v.lower() == 'all' or v.lower() == stream]
+    if not cell_years or not cell_venues:
+        return
+    for keyword, matches in keywords:
+        if matches(title):
+            for y in cell_years:
+                for v in cell_venues:
+                    yield keyword, v, y
+
+
+def scan_dump(dump_path, keywords, venues, years, on_cell=None):
+    """
+    Offline counterpart of crawl: filter a dblp.xml(.gz) dump in a single pass.
+
+    Applies the same keyword/venue/year filters that build_query_string expresses
+    for the search API.
+
+    :param on_cell: Optional callback on_cell(cell, results), called for every cell
+        once the pass is complete.
+    :return: A dictionary mapping each keyword to its list of entries.
+    """
+    matchers = [(keyword, _keyword_matcher(keyword)) for keyword in keywords]
+    cell_results = {cell: [] for cell in iter_query_cells(keywords, venues, years)}
+    scanned = 0
+    for record in iter_dump_records(dump_path):
+        scanned += 1
+        for cell in _record_cells(record, matchers, venues, years):
+            cell_results[cell].append(entry_from_record(record))
+        if scanned % 1000000 == 0:
+            logging.info(f"Scanned {scanned} records of {dump_path}.")
+    logging.info(f"Scanned {scanned} records of {dump_path}.")
+
+    all_results = {keyword: [] for keyword in keywords}
+    for cell, results in cell_results.items():
+        logging.info(f"'{cell[0]}' {cell[1]} {cell[2]}: {len(results)} results")
+        if on_cell is not None:
+            on_cell(cell, results)
+        all_results[cell[0]].extend(results)
+    return all_results
+
+
+def _record_streamid(key):
+    """Stream of a record key, e.g. conf/iclr for conf/iclr/Foo24."""
+    return key.rsplit("/", 1)[0] if "/" in key else ""
+
+
+def _fts_query(keyword):
+    """Translate a keyword into an FTS5 prefix query on every word, like DBLP search."""
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", keyword.lower()))
+
+
+class LocalIndex:
+    """
+    SQLite publication store built from the DBLP dump, with an FTS5 index on title.
+
+    search() is a drop-in replacement for get_dblp_results that answers a
+    keyword/venue/year cell locally: the FTS5 index resolves the keyword and the
+    (streamid, year) index the filters.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS publications (
+            id INTEGER PRIMARY KEY,
+            key TEXT NOT NULL UNIQUE,
+            mdate TEXT,
+            type TEXT,
+            title TEXT,
+            authors TEXT,
+            venue TEXT,
+            streamid TEXT,
+            year TEXT,
+            url TEXT
+        );
+        CREATE INDEX IF NOT EXISTS publications_stream_year ON publications(streamid, year);
+        CREATE VIRTUAL TABLE IF NOT EXISTS publications_fts USING fts5(
+            title, content='publications', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        );
+    """
+    # Keep the FTS index in sync with row-level changes made by update()
+    TRIGGERS = """
+        CREATE TRIGGER IF NOT EXISTS publications_ai AFTER INSERT ON publications BEGIN
+            INSERT INTO publications_fts(rowid, title) VALUES (new.id, new.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS publications_ad AFTER DELETE ON publications BEGIN
+            INSERT INTO publications_fts(publications_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS publications_au AFTER UPDATE ON publications BEGIN
+            INSERT INTO publications_fts(publications_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO publications_fts(rowid, title) VALUES (new.id, new.title);
+        END;
+    """
+    COLUMNS = ("key", "mdate", "type", "title", "authors", "venue", "streamid", "year", "url")
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+    @staticmethod
+    def _row_from_record(record):
+        entry = entry_from_record(record)
+        return (
+            record["key"], record["mdate"], record["type"], entry["title"], entry["authors"],
+            entry["venue"], _record_streamid(record["key"]), entry["year"], entry["url"],
+        )
+
+    @classmethod
+    def build(cls, dump_path, db_path, batch_size=10000):
+        """Load every publication of a dblp.xml(.gz) dump into a fresh index at db_path."""
+        db_path = Path(db_path)
+        tmp_path = db_path.with_name(db_path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(tmp_path)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(cls.SCHEMA)
+        insert = f"INSERT OR REPLACE INTO publications ({', '.join(cls.COLUMNS)}) VALUES ({', '.join('?' * len(cls.COLUMNS))})"
+        batch = []
+        count = 0
+        for record in iter_dump_records(dump_path):
+            batch.append(cls._row_from_record(record))
+            if len(batch) >= batch_size:
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch.clear()
+                if count % 1000000 < batch_size:
+                    logging.info(f"Indexed {count} records of {dump_path}.")
+        conn.executemany(insert, batch)
+        count += len(batch)
+        # Building the full-text index once at the end is much faster than row by row
+        conn.execute("INSERT INTO publications_fts(publications_fts) VALUES ('rebuild')")
+        conn.executescript(cls.TRIGGERS)
+        conn.commit()
+        conn.close()
+        os.replace(tmp_path, db_path)
+        logging.info(f"Built local index {db_path} with {count} records.")
+        return cls(db_path)
+
+    def update(self, dump_path, batch_size=500):
+        """
+        Bring the index up to date with a newer dump snapshot.
+
+        Records are diffed by key and mdate: new ones are inserted, changed ones
+        updated, and keys missing from the new dump deleted. Only those rows touch
+        the FTS index (through the sync triggers) instead of a full rebuild.
+
+        :return: A dictionary with the inserted, updated, unchanged and deleted counts.
+        """
+        conn = self._conn
+        conn.executescript(self.TRIGGERS)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_keys (key TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM seen_keys")
+        columns = ", ".join(self.COLUMNS)
+        insert = f"INSERT INTO publications ({columns}) VALUES ({', '.join('?' * len(self.COLUMNS))})"
+        update = f"UPDATE publications SET {', '.join(f'{c} = ?' for c in self.COLUMNS[1:])} WHERE key = ?"
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+        def apply(batch):
+            keys = [record["key"] for record in batch]
+            conn.executemany("INSERT OR IGNORE INTO seen_keys (key) VALUES (?)", [(key,) for key in keys])
+            stored = dict(conn.execute(
+                f"SELECT key, mdate FROM publications WHERE key IN ({', '.join('?' * len(keys))})", keys
+            ))
+            inserts, updates = [], []
+            for record in batch:
+                if record["key"] not in stored:
+                    inserts.append(self._row_from_record(record))
+                elif stored[record["key"]] != record["mdate"]:
+                    row = self._row_from_record(record)
+                    updates.append(row[1:] + row[:1])
+                else:
+                    stats["unchanged"] += 1
+            conn.executemany(insert, inserts)
+            conn.executemany(update, updates)
+            stats["inserted"] += len(inserts)
+            stats["updated"] += len(updates)
+
+        with conn:
+            batch = []
+            for record in iter_dump_records(dump_path):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    apply(batch)
+                    batch = []
+            if batch:
+                apply(batch)
+            stats["deleted"] = conn.execute(
+                "DELETE FROM publications WHERE key NOT IN (SELECT key FROM seen_keys)"
+            ).rowcount
+            # Merge the small segments written by the triggers without a full rebuild
+            conn.execute("INSERT INTO publications_fts(publications_fts, rank) VALUES ('merge', 500)")
+        conn.execute("DELETE FROM seen_keys")
+        logging.info(f"Updated local index {self.db_path} from {dump_path}: {stats}")
+        return stats
+
+    def search(self, keyword, venue, year):
+        """Return the entries of one keyword/venue/year cell, like get_dblp_results."""
+        filters, params = [], []
+        if venue.lower() != 'all':
+            filters.append("streamid = ?")
+            params.append(f"conf/{venue.lower()}")
+        if str(year).lower() != 'all':
+            filters.append("year = ?")
+            params.append(str(year))
+        if filters:
+            # Narrow by the (streamid, year) index first and probe the full-text match
+            # once as a rowid set
+            sql = (
+                "SELECT title, authors, venue, year, url, key FROM publications"
+                f" WHERE {' AND '.join(filters)}"
+                " AND id IN (SELECT rowid FROM publications_fts WHERE publications_fts MATCH ?)"
+            )
+            params.append(_fts_query(keyword))
+        else:
+            # Unfiltered cells: the full-text match is the only selective term, so it
+            # drives the join
+            sql = (
+                "SELECT p.title, p.authors, p.venue, p.year, p.url, p.key FROM publications_fts"
+                " CROSS JOIN publications AS p ON p.id = publications_fts.rowid"
+                " WHERE publications_fts MATCH ?"
+            )
+            params = [_fts_query(keyword)]
+        rows = self._conn.execute(sql, params).fetchall()
+        logging.info(f"'{keyword}' {venue} {year}: {len(rows)} results")
+        return [Publication(*row) for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+def crawl_local(index, keywords, venues, years, completed=None, on_cell=None, collect=True):
+    """
+    Answer the keyword × year × venue cells from a LocalIndex instead of the search API.
+
+    Takes the same completed/on_cell/collect arguments as crawl_async.
+
+    :return: A dictionary mapping each keyword to its list of entries, or None if
+        collect is False.
+    """
+    completed = completed or {}
+    all_results = {keyword: [] for keyword in keywords}
+    for cell in iter_query_cells(keywords, venues, years):
+        if cell in completed:
+            results = completed[cell]
+        else:
+            results = index.search(*cell)
+            if on_cell is not None:
+                on_cell(cell, results)
+        if collect:
+            all_results[cell[0]].extend(results)
+    return all_results if collect else None
+
+
+RESULT_FIELDS = ("title", "authors", "venue", "year", "url", "key")
+
+
+def _optional_numpy():
+    """Return the numpy module, or None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class ResultTable:
+    """
+    Columnar in-memory table of crawl results, for analyses over a whole run.
+
+    The keyword, venue and year columns are dictionary-encoded. Each stores integer
+    codes in a stdlib array, indexing a list of distinct values. Authors are stored
+    as one flat array of codes into an author dictionary, plus per-row offsets.
+    Titles, keys and non-canonical URLs are plain lists.
+
+    Group-by summaries (count_by, author_counts, coauthors) run vectorized with
+    NumPy over zero-copy views of the code arrays when NumPy is installed, and
+    count the arrays directly otherwise. to_arrow() wraps the same buffers as Arrow
+    dictionary arrays. Writers take a table through write_table().
+    """
+
+    DICTIONARY_COLUMNS = ("keyword", "venue", "year")
+
+    def __init__(self):
+        self.dictionaries = {column: [] for column in self.DICTIONARY_COLUMNS + ("author",)}
+        self._lookup = {column: {} for column in self.dictionaries}
+        self.codes = {column: array("I") for column in self.DICTIONARY_COLUMNS}
+        self.author_offsets = array("I", [0])
+        self.author_codes = array("I")
+        self.titles = []
+        self.keys = []
+        self.urls = []  # None where the URL is the canonical record URL
+
+    @classmethod
+    def from_results(cls, all_results):
+        """Build a table from a keyword -> entries mapping as returned by crawl()."""
+        table = cls()
+        for keyword, entries in all_results.items():
+            table.extend(keyword, entries)
+        return table
+
+    def _encode(self, column, value):
+        if isinstance(value, list):
+            value = tuple(value)  # Records listed under several venues
+        lookup = self._lookup[column]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.dictionaries[column])
+            self.dictionaries[column].append(value)
+        return code
+
+    def _decode(self, column, code):
+        value = self.dictionaries[column][code]
+        return list(value) if isinstance(value, tuple) else value
+
+    def append(self, keyword, entry):
+        if not isinstance(entry, Publication):
+            entry = Publication.from_dict(entry)
+        self.codes["keyword"].append(self._encode("keyword", keyword))
+        self.codes["venue"].append(self._encode("venue", entry.venue))
+        self.codes["year"].append(self._encode("year", entry.year))
+        self.author_codes.extend(self._encode("author", name) for name in entry.author_names)
+        self.author_offsets.append(len(self.author_codes))
+        self.titles.append(entry.title)
+        self.keys.append(entry.key)
+        self.urls.append(entry._url)
+
+    def extend(self, keyword, entries):
+        for entry in entries:
+            self.append(keyword, entry)
+
+    def __len__(self):
+        return len(self.titles)
+
+    @property
+    def keywords(self):
+        return list(self.dictionaries["keyword"])
+
+    @staticmethod
+    def _view(np, codes):
+        """Zero-copy NumPy view of a code array; drop it before the array grows again."""
+        return np.frombuffer(codes, dtype=np.dtype(f"u{codes.itemsize}"))
+
+    def row(self, index):
+        """Materialize one row as a Publication."""
+        start, end = self.author_offsets[index], self.author_offsets[index + 1]
+        authors = self.dictionaries["author"]
+        key = self.keys[index]
+        url = self.urls[index]
+        return Publication(
+            self.titles[index], [authors[code] for code in self.author_codes[start:end]],
+            self._decode("venue", self.codes["venue"][index]), self._decode("year", self.codes["year"][index]),
+            url if url is not None else DBLP_RECORD_URL.format(key=key), key,
+        )
+
+    def rows(self, keyword=None):
+        """Yield the rows of one keyword, or of the whole table, as Publications."""
+        if keyword is None:
+            indices = range(len(self))
+        else:
+            code = self._lookup["keyword"].get(keyword)
+            np = _optional_numpy()
+            if code is None:
+                indices = []
+            elif np is not None:
+                indices = np.flatnonzero(self._view(np, self.codes["keyword"]) == code).tolist()
+            else:
+                indices = [i for i, c in enumerate(self.codes["keyword"]) if c == code]
+        for index in indices:
+            yield self.row(index)
+
+    def count_by(self, *columns):
+        """
+        Count rows per combination of dictionary-encoded columns, e.g. count_by("venue", "year").
+
+        :return: A dict mapping each occurring tuple of values to its number of rows.
+            A venue list of a multi-venue record appears as a tuple.
+        """
+        np = _optional_numpy()
+        if np is not None and len(self):
+            combined = np.zeros(len(self), dtype=np.int64)
+            sizes = [len(self.dictionaries[column]) for column in columns]
+            for column, size in zip(columns, sizes):
+                combined = combined * size + self._view(np, self.codes[column])
+            values, counts = np.unique(combined, return_counts=True)
+            groups = zip(*(codes.tolist() for codes in np.unravel_index(values, sizes)), counts.tolist())
+        else:
+            groups = ((*codes, count) for codes, count in Counter(zip(*(self.codes[column] for column in columns))).items())
+        return {
+            tuple(self.dictionaries[column][code] for column, code in zip(columns, group[:-1])): group[-1]
+            for group in groups
+        }
+
+    def author_counts(self):
+        """Return {author: number of rows} for every author in the table."""
+        np = _optional_numpy()
+        if np is not None:
+            counts = np.bincount(self._view(np, self.author_codes), minlength=len(self.dictionaries["author"])).tolist()
+        else:
+            counter = Counter(self.author_codes)
+            counts = [counter[code] for code in range(len(self.dictionaries["author"]))]
+        return dict(zip(self.dictionaries["author"], counts))
+
+    def coauthors(self, author):
+        """Return {co-author: number of shared rows} for one author."""
+        code = self._lookup["author"].get(author)
+        if code is None:
+            return {}
+        names = self.dictionaries["author"]
+        np = _optional_numpy()
+        if np is None:
+            counter = Counter()
+            offsets = self.author_offsets
+            for row in range(len(self)):
+                row_codes = self.author_codes[offsets[row]:offsets[row + 1]]
+                if code in row_codes:
+                    counter.update(other for other in row_codes if other != code)
+            return {names[other]: count for other, count in counter.items()}
+
+        codes = self._view(np, self.author_codes)
+        offsets = self._view(np, self.author_offsets).astype(np.int64)
+        rows = np.searchsorted(offsets, np.flatnonzero(codes == code), side="right") - 1
+        starts = offsets[rows]
+        lengths = offsets[rows + 1] - starts
+        # Positions of every author of the matching rows, concatenated
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        others = codes[positions]
+        others = others[others != code]
+        counts = np.bincount(others, minlength=len(names))
+        return {names[other]: int(counts[other]) for other in np.flatnonzero(counts).tolist()}
+
+    def to_arrow(self):
+        """
+        Return the table as a pyarrow Table; needs pyarrow.
+
+        keyword, venue and year become DictionaryArrays whose indices wrap the code
+        arrays without copying, and authors a list<string> column.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+        except ImportError as e:
+            raise RuntimeError("Arrow conversion requires pyarrow (pip install pyarrow)") from e
+
+        def codes_array(codes, type=pa.uint32()):
+            return pa.Array.from_buffers(type, len(codes), [None, pa.py_buffer(codes)])
+
+        columns = {}
+        for column in self.DICTIONARY_COLUMNS:
+            dictionary = pa.array([str(self._decode(column, code)) for code in range(len(self.dictionaries[column]))], pa.string())
+            columns[column] = pa.DictionaryArray.from_arrays(codes_array(self.codes[column]), dictionary)
+        columns["title"] = pa.array(self.titles, pa.string())
+        author_names = pa.array(self.dictionaries["author"], pa.string())
+        columns["authors"] = pa.ListArray.from_arrays(
+            codes_array(self.author_offsets, pa.int32()), author_names.take(codes_array(self.author_codes))
+        )
+        keys = pa.array(self.keys, pa.string())
+        urls = pa.array(self.urls, pa.string())
+        canonical = pc.binary_join_element_wise(DBLP_RECORD_URL.format(key=""), keys, "")
+        columns["url"] = pc.if_else(pc.is_null(urls), canonical, urls)
+        columns["key"] = keys
+        return pa.table(columns)
+
+
+def summarize_results(table, top_authors=10):
+    """Return printable lines with the hit counts per keyword, venue and year and the most frequent authors."""
+    lines = [f"{len(table)} results"]
+    for (keyword, venue, year), count in sorted(table.count_by("keyword", "venue", "year").items(), key=str):
+        lines.append(f"  {keyword} | {venue} | {year}: {count}")
+    authors = sorted(table.author_counts().items(), key=lambda item: -item[1])[:top_authors]
+    if authors:
+        lines.append("Most frequent authors:")
+        lines.extend(f"  {author}: {count}" for author, count in authors)
+    return lines
+
+
+class ResultWriter:
+    """
+    Output backend that receives entries incrementally as the crawl produces them.
+
+    Subclasses implement write() and close(); main() picks one with --format and
+    feeds it each cell's entries from the crawl's on_cell callback.
+    """
+
+    extension = None
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+
+    def write(self, keyword, entry):
+        raise NotImplementedError
+
+    def write_many(self, keyword, entries):
+        for entry in entries:
+            self.write(keyword, entry)
+
+    def write_table(self, table):
+        """Write a ResultTable keyword by keyword, materializing one row at a time."""
+        for keyword in table.keywords:
+            self.write_many(keyword, table.rows(keyword))
+
+    def close(self):
+        logging.info(f"All results have been saved to {self.path} ({self.count} rows).")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvResultWriter(ResultWriter):
+    """One CSV file with a leading keyword column, flushed after every cell."""
+
+    extension = "csv"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = self.path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=("keyword",) + RESULT_FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, keyword, entry):
+        self._writer.writerow(dict(entry, keyword=keyword))
+        self.count += 1
+
+    def write_many(self, keyword, entries):
+        super().write_many(keyword, entries)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class JsonlResultWriter(ResultWriter):
+    """One JSON object per line, each carrying its keyword."""
+
+    extension = "jsonl"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = self.path.open("w", encoding="utf-8")
+
+    def write(self, keyword, entry):
+        record = {"keyword": keyword}
+        record.update((field, entry.get(field, "")) for field in RESULT_FIELDS)
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def write_many(self, keyword, entries):
+        super().write_many(keyword, entries)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ParquetResultWriter(ResultWriter):
+    """Parquet file written in row groups of row_group_size rows; needs pyarrow."""
+
+    extension = "parquet"
+
+    def __init__(self, path, row_group_size=50000):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._schema = pa.schema([(field, pa.string()) for field in ("keyword",) + RESULT_FIELDS])
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+        self.row_group_size = row_group_size
+        self._columns = {field: [] for field in self._schema.names}
+
+    def write(self, keyword, entry):
+        self._columns["keyword"].append(keyword)
+        for field in RESULT_FIELDS:
+            self._columns[field].append(str(entry.get(field, "")))
+        self.count += 1
+        if len(self._columns["keyword"]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._columns["keyword"]:
+            return
+        self._writer.write_table(self._pa.table(self._columns, schema=self._schema))
+        self._columns = {field: [] for field in self._schema.names}
+
+    def write_table(self, table):
+        """Write a ResultTable from its Arrow form, without going through Python rows."""
+        import pyarrow.compute as pc
+        self._flush()
+        arrow = table.to_arrow()
+        columns = {
+            field: pc.cast(arrow[field], self._pa.string()) for field in ("keyword",) + RESULT_FIELDS if field != "authors"
+        }
+        columns["authors"] = pc.binary_join(arrow["authors"], ", ")
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+        self.count += len(table)
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        super().close()
+
+
+EXCEL_MAX_ROWS = 1048576  # Rows per worksheet, including the header row
+
+
+class ExcelResultWriter(ResultWriter):
+    """
+    Streams entries into one sheet per keyword of a write-only openpyxl workbook.
+
+    Rows are spooled to disk as they are appended, so memory stays flat however many
+    results there are. A keyword whose rows exceed EXCEL_MAX_ROWS continues on
+    additional sheets named "<keyword> (2)", "<keyword> (3)", ...
+    """
+
+    extension = "xlsx"
+
+    def __init__(self, path):
+        super().__init__(path)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheets = {}  # keyword -> [worksheet, rows written, part number]
+
+    def _new_sheet(self, keyword, part):
+        # Excel sheet names have a maximum length of 31 characters
+        suffix = f" ({part})" if part > 1 else ""
+        sheet = self._workbook.create_sheet(title=sanitize_filename(keyword)[:31 - len(suffix)] + suffix)
+        sheet.append(list(RESULT_FIELDS))
+        return [sheet, 1, part]
+
+    def write(self, keyword, entry):
+        state = self._sheets.get(keyword)
+        if state is None or state[1] >= EXCEL_MAX_ROWS:
+            state = self._new_sheet(keyword, state[2] + 1 if state else 1)
+            self._sheets[keyword] = state
+        state[0].append([entry.get(field, "") for field in RESULT_FIELDS])
+        state[1] += 1
+        self.count += 1
+
+    def close(self):
+        if not self._sheets:
+            logging.info(f"No results to save to {self.path}.")
+            return
+        try:
+            self._workbook.save(self.path)
+            super().close()
+        except Exception as e:
+            logging.error(f"Error saving results to Excel file: {e}")
+
+
+RESULT_WRITERS = {
+    writer.extension: writer
+    for writer in (ExcelResultWriter, CsvResultWriter, JsonlResultWriter, ParquetResultWriter)
+}
+
+
+def open_result_writer(fmt, outdir, name="results"):
+    """Create the ResultWriter for an output format, writing to <outdir>/<name>.<format>."""
+    writer_class = RESULT_WRITERS[fmt]
+    return writer_class(Path(outdir) / f"{name}.{writer_class.extension}")
+
+
+def fetch_bibtex_bulk(queries, cell_counts, wanted, session, headers, limiter=None, cache=None, on_entry=None):
+    """
+    Fetch BibTeX for many records at once through the search API's `format=bib` export.
+
+    Each (coalesced) query of the crawl is re-run with format=bib, paging with `f`/`h`
+    over the number of hits its cells returned, so one request yields up to
+    MAX_PAGE_SIZE entries instead of one. The combined responses are split by
+    citation key and only records in `wanted` are kept. Queries none of whose cells
+    matched a record still missing are skipped, and a query stops paging once its
+    cells have no missing records left.
+
+    :param queries: (keyword, venues, years) queries as produced by plan_queries.
+    :param cell_counts: Mapping of each (keyword, venue, year) cell to its hit count.
+    :param wanted: Mapping of each DBLP record key to retrieve to the cells it matched,
+        as recorded in DedupIndex.matches.
+    :param on_entry: Optional callback on_entry(record_key, bibtex), called as each
+        wanted entry arrives.
+    :return: The set of record keys that were retrieved.
+    """
+    pending = set(wanted)
+    found = set()
+    pending_per_cell = Counter(cell for key in pending for cell in wanted[key])
+
+    def has_pending(query):
+        return any(pending_per_cell[cell] for cell in iter_query_cells([query[0]], query[1], query[2]))
+
+    stack = list(reversed(queries))
+    while stack and pending:
+        query = stack.pop()
+        keyword, venues, years = query
+        hits = sum(cell_counts.get(cell, 0) for cell in iter_query_cells([keyword], venues, years))
+        if hits == 0 or not has_pending(query):
+            continue
+        if hits > MAX_COALESCED_HITS and _split_query(query):
+            stack.extend(reversed(_split_query(query)))
+            continue
+
+        query_string = build_query_string(keyword, venues, years)
+        label = f"BibTeX '{keyword}' {'|'.join(venues)} {'|'.join(str(year) for year in years)}"
+        offset = 0
+        while offset < hits and has_pending(query):
+            page_size = min(MAX_PAGE_SIZE, hits - offset)
+            params = {"q": query_string, "format": "bib", "h": page_size, "f": offset}
+            text = _fetch_search_page(params, session, headers, label, limiter, cache, decode=lambda body: body.decode("utf-8"))
+            if text is None:
+                break
+            entries = split_bibtex(text)
+            for citation_key, bibtex in entries:
+                key = record_key_of_citation(citation_key)
+                if key in pending:
+                    pending.discard(key)
+                    found.add(key)
+                    pending_per_cell.subtract(wanted[key])
+                    if on_entry is not None:
+                        on_entry(key, bibtex)
+            # Crossref'd proceedings can add entries, so count hits by the page size asked for
+            offset += page_size
+            if not entries:
+                break
+    logging.info(f"Bulk BibTeX export returned {len(found)} of {len(wanted)} wanted records.")
+    return found
+
+
+def save_results_to_excel_file(filename, all_results):
+    """
+    Saves all_results to an Excel file with each keyword's results in a separate sheet.
+
+    Rows are streamed from each sheet's entry iterable through ExcelResultWriter, so
+    no DataFrame or in-memory workbook is built.
+    
+    :param filename: The name of the Excel file.
+    :param all_results: A dictionary where keys are sheet names and values are iterables
+        of entries, or a ResultTable whose keywords become the sheets.
+    """
+    writer = ExcelResultWriter(filename)
+    if isinstance(all_results, ResultTable):
+        writer.write_table(all_results)
+        writer.close()
+        return
+    for sheet_name, results in all_results.items():
+        count = writer.count
+        writer.write_many(sheet_name, results)
+        if writer.count == count:
+            logging.info(f"No results to save for keyword: {sheet_name}")
+    writer.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Description of your script goes here',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter  # Shows defaults in help message
+    )
+    
+    parser.add_argument('--save_bibtex', action='store_true')
+    parser.add_argument('-k', '--keywords', nargs='+', default=['data condensation', 'data distillation'])
+    parser.add_argument('-v', '--venues', nargs='+', default=["ICLR", "ICML", "NIPS", "AAAI", "KDD", "ICDM", "WSDM", "WWW", "CIKM", "IJCAI", "CVPR", "ICCV", "ECCV"])
+    parser.add_argument('-y', '--years', nargs='+', default=['2024', '2023'])
+    parser.add_argument('-o', '--outdir', default='./data_condensation')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse the previous run in <outdir>: refetch only open years and cells whose hit count changed')
+    parser.add_argument('--open-years', type=int, default=1, help='Number of most recent years --incremental always refetches')
+    parser.add_argument('-f', '--format', choices=sorted(RESULT_WRITERS), default='xlsx', help='Output format of <outdir>/results.<format>')
+    parser.add_argument('--resume', action='store_true', help='Skip cells and BibTeX files recorded in <outdir>/checkpoint.jsonl')
+    parser.add_argument('--offline', metavar='DUMP', help='Filter a local dblp.xml.gz dump instead of querying the search API')
+    parser.add_argument('--index', metavar='DB', help='Answer queries from a local SQLite index built with --build-index')
+    parser.add_argument('--build-index', metavar='DUMP', help='Build the --index database from a dblp.xml.gz dump first')
+    parser.add_argument('--update-index', metavar='DUMP', help='Incrementally refresh the --index database from a newer dump first')
+    parser.add_argument('--probe', action='store_true', help='Count hits with h=0 probes first: skip empty queries and size pages from the counts')
+    parser.add_argument('--plan-only', action='store_true', help='Run the --probe pass, print the request and runtime estimate, and exit')
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help='Crawl only shard i (0-based) of N, writing to <outdir>/shard-i-of-N')
+    parser.add_argument('--merge', action='store_true', help='Combine the <outdir>/shard-*-of-* outputs into <outdir>/results.<format> and exit')
+    parser.add_argument('--coordinator', metavar='QUEUE_DB',
+                        help='Queue the queries in a SQLite work queue and collect what --worker processes fetch')
+    parser.add_argument('--worker', metavar='QUEUE_DB', help='Fetch queries from a --coordinator work queue until it is drained')
+    parser.add_argument('--tasks', type=int, default=16,
+                        help='Number of parts --coordinator cuts the pending cells into; each part is coalesced into its own tasks')
+    parser.add_argument('--lease', type=float, default=600, help='Seconds before a task held by an unresponsive worker is handed out again')
+    parser.add_argument('--json-decoder', choices=sorted(JSON_DECODERS), default=json_decoder,
+                        help='Decoder of search responses; orjson and msgspec are used when installed')
+    parser.add_argument('--summary', action='store_true', help='Print hit counts per keyword, venue and year and the most frequent authors')
+    parser.add_argument('--log-file', default=LOG_FILE, help='File the crawl log is appended to')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                        help='Plain text lines, or JSON lines that also record every request with its timings')
+    parser.add_argument('--log-max-mb', type=float, default=10, help='Size at which the log file is rotated')
+    parser.add_argument('--log-backups', type=int, default=5, help='Number of rotated log files kept')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of query cells fetched in parallel')
+    parser.add_argument('--no-coalesce', action='store_true', help='Send one query per keyword/venue/year instead of OR-combined queries')
+    parser.add_argument('--bibtex-bulk', action='store_true', help='Fetch BibTeX through multi-record search exports instead of one request per paper')
+    parser.add_argument('--bib-layout', choices=['files', 'keyword', 'single'], default='files',
+                        help='One .bib per paper, one consolidated .bib per keyword, or a single bibliography.bib (with a .idx offset index)')
+    parser.add_argument('--bibtex-workers', type=int, default=4, help='Number of parallel BibTeX downloads')
+    parser.add_argument('--rate', type=float, default=1.0, help='Maximum requests per second (lowered automatically on 429)')
+    parser.add_argument('--burst', type=int, default=2, help='Number of requests that may be sent back to back')
+    parser.add_argument('--cache-dir', default=None, help='Directory of the search response cache (default: <outdir>/.cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the response cache')
+    parser.add_argument('--cache-ttl', type=float, default=7 * 24, help='Hours before a cached response is refetched')
+    parser.add_argument('--cache-max-mb', type=int, default=512, help='Size above which least recently used responses are evicted')
+    
+    args = parser.parse_args()
+    if (args.build_index or args.update_index) and not args.index:
+        parser.error('--build-index and --update-index require --index')
+    if args.plan_only and (args.index or args.offline):
+        parser.error('--plan-only probes the search API and cannot be combined with --index or --offline')
+    if args.tasks < 1:
+        parser.error('--tasks must be at least 1')
+    if args.coordinator and args.worker:
+        parser.error('--coordinator and --worker are separate processes')
+    if args.shard and args.merge:
+        parser.error('--merge combines the shards of <outdir> and does not take --shard')
+    return args
+
+def main():
+    args = parse_args()
+    listener = configure_logging(
+        args.log_file, args.log_format, max_bytes=int(args.log_max_mb * 1024 * 1024), backup_count=args.log_backups,
+    )
+    try:
+        run(args)
+    finally:
+        # Write out records still queued for the background thread
+        listener.stop()
+
+
+def run(args):
+    """Run the crawl described by the parsed command line arguments."""
+    set_json_decoder(args.json_decoder)
+
+    outdir = Path(args.outdir)
+    if args.merge:
+        shard_dirs = sorted(outdir.glob('shard-*-of-*'))
+        missing = merge_shards(shard_dirs, outdir, args.keywords, args.venues, args.years, args.format)
+        if missing:
+            print(f"{missing} cells are missing from the shards in {outdir}; rerun their shards with --resume.")
+        return
+    if args.shard:
+        outdir = outdir / f"shard-{args.shard[0]}-of-{args.shard[1]}"
+    outdir.mkdir(parents=True, exist_ok=True)
+    headers = DEFAULT_HEADERS
+    # One limiter paces both the search queries and the BibTeX downloads
+    limiter = RateLimiter(rate=args.rate, burst=args.burst)
+    # Local searches only go online for BibTeX; otherwise requests is never imported
+    uses_network = args.worker or args.save_bibtex or not (args.index or args.offline)
+    session = None
+    cache = None
+    if uses_network:
+        # Create a session with retries, pooled for the concurrent workers
+        session = create_session_with_retries(pool_size=args.concurrency + args.bibtex_workers)
+    if uses_network and not args.no_cache:
+        cache = ResponseCache(
+            args.cache_dir or outdir / '.cache',
+            ttl=args.cache_ttl * 3600,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+        )
+
+    if args.worker:
+        broker = SqliteBroker(args.worker, lease=args.lease)
+        run_worker(broker, session, headers, limiter, cache, concurrency=args.concurrency)
+        broker.close()
+        session.close()
+        if cache is not None:
+            cache.close()
+        return
+
+    journal_path = outdir / 'checkpoint.jsonl'
+    resume = args.resume or args.incremental
+    if args.plan_only:
+        # Planning only reads the checkpoint; opening a CrawlJournal could truncate it
+        journal = None
+        recorded, recorded_totals = read_journal(journal_path)[:2] if resume and journal_path.exists() else ({}, {})
+    else:
+        # Every finished cell and BibTeX file is checkpointed so that --resume can pick up
+        journal = CrawlJournal(journal_path, resume=resume)
+        recorded, recorded_totals = journal.cells, journal.totals
+    cells = list(iter_query_cells(args.keywords, args.venues, args.years))
+    foreign = {}
+    if args.shard:
+        # Cells of other shards are handed to the backends as done, with no entries
+        owned = shard_cells(args.keywords, args.venues, args.years, args.shard)
+        foreign = {cell: [] for cell in cells if cell not in owned}
+        cells = [cell for cell in cells if cell in owned]
+        logging.info(f"Shard {args.shard[0]}/{args.shard[1]} owns {len(cells)} of {len(cells) + len(foreign)} cells.")
+    completed = {cell: recorded[cell] for cell in cells if cell in recorded}
+    if args.incremental and not (args.index or args.offline):
+        # Later journal records supersede earlier ones, so refetched cells are merged in
+        completed = unchanged_cells(
+            completed, args.keywords, args.venues, args.years, session, headers, limiter,
+            coalesce=not args.no_coalesce, open_years=args.open_years, totals=recorded_totals,
+        )
+
+    skipped = {**foreign, **completed}
+    # Refetched cells of an incremental run must reflect the server, not a cached page
+    search_cache = None if args.incremental else cache
+    plan = None
+    if (args.probe or args.plan_only) and not (args.index or args.offline):
+        plan = plan_crawl(
+            args.keywords, args.venues, args.years, session, headers, limiter,
+            coalesce=not args.no_coalesce, completed=skipped, concurrency=args.concurrency,
+            partitions=args.tasks if args.coordinator else 1,
+        )
+        requests_needed, seconds = estimate_plan(plan, limiter.rate, limiter.burst)
+        empty = sum(1 for _, total in plan if total == 0)
+        summary = (f"Plan: {len(plan)} queries ({empty} empty), about {requests_needed} requests"
+                   f" taking {seconds:.0f} s at {limiter.rate:g} req/s.")
+        print(summary)
+        logging.info(summary)
+        if args.plan_only:
+            session.close()
+            if cache is not None:
+                cache.close()
+            return
+
+    writer = open_result_writer(args.format, outdir)
+    downloader = None
+    bibliography = None
+    if args.save_bibtex:
+        if args.bib_layout != 'files':
+            bibliography = Bibliography(outdir / 'bibs', per_keyword=args.bib_layout == 'keyword', append=args.resume or args.incremental)
+        # Downloads start as soon as each cell's hits arrive and overlap the search
+        downloader = BibtexDownloader(
+            outdir / 'bibs', session, headers, limiter, max_workers=args.bibtex_workers, journal=journal,
+            save=bibliography.add if bibliography is not None else None, cache=cache,
+        )
+
+    # Each publication is written once per keyword and downloaded once overall
+    dedup = DedupIndex()
+    cell_counts = {}
+    bulk_pending = {}  # record key -> entry whose BibTeX is taken from the bulk export
+
+    # Kept columnar, so a summary costs little more memory than the output itself
+    table = ResultTable() if args.summary else None
+
+    def emit(cell, results):
+        rows, unique = dedup.add(cell, results)
+        cell_counts[cell] = len(results)
+        writer.write_many(cell[0], rows)
+        if table is not None:
+            table.extend(cell[0], rows)
+        if downloader is None:
+            return
+        if bibliography is not None:
+            for r in rows:
+                bibliography.want(DedupIndex.key_of(r), cell[0])
+        for r in unique:
+            if args.bibtex_bulk and r.get('key'):
+                if r['url'] not in journal.bibtex_done:
+                    bulk_pending[r['key']] = r
+            else:
+                downloader.submit(r['url'], r['title'])
+
+    # Results are streamed to the output as cells complete, starting with resumed ones
+    for cell, results in completed.items():
+        emit(cell, results)
+
+    # Each fetched cell's share of its query's @total, journaled for --incremental
+    cell_totals = {}
+
+    def on_cell(cell, results):
+        if cell in skipped:
+            return
+        journal.record_cell(cell, results, cell_totals.get(cell))
+        emit(cell, results)
+
+    if args.build_index:
+        LocalIndex.build(args.build_index, args.index).close()
+    elif args.update_index:
+        index = LocalIndex(args.index)
+        index.update(args.update_index)
+        index.close()
+
+    if len(completed) == len(cells):
+        logging.info(f"All cells are recorded in {journal.path}, nothing to fetch.")
+    elif args.index:
+        index = LocalIndex(args.index)
+        crawl_local(index, args.keywords, args.venues, args.years, completed=skipped, on_cell=on_cell, collect=False)
+        index.close()
+    elif args.offline:
+        scan_dump(args.offline, args.keywords, args.venues, args.years, on_cell=on_cell)
+    elif args.coordinator:
+        broker = SqliteBroker(args.coordinator, lease=args.lease)
+        crawl_queue(
+            broker, args.keywords, args.venues, args.years,
+            coalesce=not args.no_coalesce, completed=skipped, on_cell=on_cell, plan=plan, totals=cell_totals,
+            partitions=args.tasks, keep_done=args.resume,
+        )
+        broker.close()
+    else:
+        crawl(
+            args.keywords, args.venues, args.years,
+            session=session, headers=headers,
+            concurrency=args.concurrency, limiter=limiter, cache=search_cache,
+            coalesce=not args.no_coalesce, completed=skipped, on_cell=on_cell, collect=False, plan=plan,
+            totals=cell_totals,
+        )
+
+    if bulk_pending:
+        def on_entry(key, bibtex):
+            entry = bulk_pending.pop(key)
+            try:
+                downloader.save(bibtex, entry['title'])
+            except Exception as e:
+                logging.error(f"Error saving BibTeX for {entry['title']}: {e}")
+                return
+            journal.record_bibtex(entry['url'])
+
+        queries = plan_queries(args.keywords, args.venues, args.years, coalesce=not args.no_coalesce)
+        wanted = {key: dedup.matches[key] for key in bulk_pending}
+        fetch_bibtex_bulk(queries, cell_counts, wanted, session, headers, limiter, cache, on_entry=on_entry)
+        # Records missing from the export fall back to one request each
+        for entry in bulk_pending.values():
+            downloader.submit(entry['url'], entry['title'])
+
+    if downloader is not None:
+        downloader.close()
+    if bibliography is not None:
+        bibliography.close()
+    if args.incremental:
+        # Each incremental run appends the refetched cells again; keep only the latest copy
+        journal.compact()
+    journal.close()
+    writer.close()
+    logging.info(f"{len(dedup)} unique publications matched {len(cells)} cells.")
+    failed = sum(1 for cell in cells if cell not in cell_counts)
+    if failed:
+        message = f"{failed} cells could not be fetched and were not checkpointed; rerun with --resume."
+        logging.warning(message)
+        print(message)
+    if table is not None:
+        print("\n".join(summarize_results(table)))
     
-    session.close()
+    if session is not None:
+        session.close()
+    if cache is not None:
+        cache.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()